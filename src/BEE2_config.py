@@ -7,10 +7,15 @@ This also contains a version of ConfigParser that can be easily resaved.
 
 It only saves if the values are modified.
 Most functions are also altered to allow defaults instead of erroring.
+In the app, enable_write_behind() is called so save_check() writes the
+changes in the background, at most once every SAVE_INTERVAL seconds.
 """
 from configparser import ConfigParser, NoOptionError, SectionProxy, ParsingError
+from io import StringIO
 from pathlib import Path
-from typing import Any, Mapping, Optional
+from typing import Any, Dict, Mapping, Optional
+import atexit
+import threading
 
 from srctools import AtomicWriter, Property, KeyValError
 
@@ -25,6 +30,42 @@ LOGGER = srctools.logger.get_logger(__name__)
 # values.
 option_handler = utils.FuncLookup('OptionHandlers')  # type: utils.FuncLookup
 
+# If enabled, save_check() waits this many seconds before writing changes,
+# so a burst of changes is only written once.
+SAVE_INTERVAL = 2.0
+_write_behind = False
+# The configs with a save scheduled, by ID since they aren't hashable.
+_pending_saves = {}  # type: Dict[int, ConfigFile]
+_pending_lock = threading.Lock()
+
+
+def enable_write_behind() -> None:
+    """Make save_check() save configs in the background, after a delay.
+
+    Anything still waiting is saved when the application exits.
+    """
+    global _write_behind
+    if not _write_behind:
+        _write_behind = True
+        atexit.register(flush_saves)
+
+
+def flush_saves() -> None:
+    """Immediately save all the configs waiting for a background save.
+
+    This also waits for any background saves already being written.
+    """
+    with _pending_lock:
+        pending = list(_pending_saves.values())
+    for config in pending:
+        config._cancel_save()
+        if config.has_changed:
+            config.save()
+        else:
+            # The timer may be writing it right now, wait for that.
+            with config._write_lock:
+                pass
+
 
 def get_curr_settings() -> Property:
     """Return a property tree defining the current options."""
@@ -93,6 +134,7 @@ class ConfigFile(ConfigParser):
     has_changed: bool
     filename: Optional[Path]
     _writer: Optional[AtomicWriter]
+    _save_timer: Optional[threading.Timer]
 
     def __init__(
         self,
@@ -100,6 +142,7 @@ class ConfigFile(ConfigParser):
         *,
         in_conf_folder: bool=True,
         auto_load: bool=True,
+        write_behind: bool=True,
     ) -> None:
         """Initialise the config file.
 
@@ -107,7 +150,16 @@ class ConfigFile(ConfigParser):
         If `auto_load` is true, this file will immediately be read and parsed.
         If in_conf_folder is set, The folder is relative to the 'config/'
         folder in the BEE2 folder.
+        If write_behind is false, save_check() always saves immediately.
+        This is needed for configs the compiler reads.
         """
+        # Held while changing values, or reading them to save.
+        self._lock = threading.RLock()
+        # Held while writing to the file.
+        self._write_lock = threading.Lock()
+        self._save_timer = None
+        self.write_behind = write_behind
+
         super().__init__()
 
         self.has_changed = False
@@ -160,15 +212,78 @@ class ConfigFile(ConfigParser):
         if self.filename is None or self._writer is None:
             raise ValueError('No filename provided!')
 
-        with self._writer as conf:
-            self.write(conf)
-        self.has_changed = False
+        self._cancel_save()
+        self._write()
+
+    def _write(self) -> None:
+        """Write our values out, on whichever thread this is called from.
+
+        The values are copied while holding the write lock, so if two
+        threads save at once the later values are always written last.
+        """
+        with self._write_lock:
+            with self._lock:
+                buf = StringIO()
+                self.write(buf)
+                self.has_changed = False
+            with self._writer as conf:
+                conf.write(buf.getvalue())
 
     def save_check(self) -> None:
-        """Check to see if we have different values, and save if needed."""
-        if self.has_changed:
+        """Check to see if we have different values, and save if needed.
+
+        If write-behind is enabled, this is done in the background shortly
+        afterwards.
+        """
+        if not self.has_changed:
+            return
+        if _write_behind and self.write_behind and self.filename is not None:
+            self._schedule_save()
+        else:
             self.save()
 
+    def _schedule_save(self) -> None:
+        """Start the timer to save in the background, if not already."""
+        with _pending_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = timer = threading.Timer(
+                SAVE_INTERVAL,
+                self._background_save,
+            )
+            timer.daemon = True
+            _pending_saves[id(self)] = self
+        timer.start()
+
+    def _cancel_save(self) -> None:
+        """Stop any pending background save."""
+        with _pending_lock:
+            timer = self._save_timer
+            self._save_timer = None
+            _pending_saves.pop(id(self), None)
+        if timer is not None:
+            timer.cancel()
+
+    def _background_save(self) -> None:
+        """Run by the timer, to save our changes.
+
+        We stay in _pending_saves until this is written, so flush_saves()
+        knows to wait for it.
+        """
+        with _pending_lock:
+            self._save_timer = None
+        try:
+            if self.has_changed:
+                LOGGER.info('Saving changes in config "{}"!', self.filename)
+                self._write()
+        except Exception:
+            LOGGER.exception('Failed to save config "{}"!', self.filename)
+        finally:
+            with _pending_lock:
+                # Unless another save was scheduled meanwhile.
+                if self._save_timer is None:
+                    _pending_saves.pop(id(self), None)
+
     def set_defaults(self, def_settings: Mapping[str, Mapping[str, Any]]) -> None:
         """Set the default values if the settings file has no values defined."""
         for sect, values in def_settings.items():
@@ -235,19 +350,22 @@ class ConfigFile(ConfigParser):
     get_int = getint
 
     def add_section(self, section: str) -> None:
-        self.has_changed = True
-        super().add_section(section)
+        with self._lock:
+            self.has_changed = True
+            super().add_section(section)
 
     def remove_section(self, section: str) -> bool:
-        self.has_changed = True
-        return super().remove_section(section)
+        with self._lock:
+            self.has_changed = True
+            return super().remove_section(section)
 
     def set(self, section: str, option: str, value: str) -> None:
-        orig_val = self.get(section, option, fallback=None)
-        value = str(value)
-        if orig_val is None or orig_val != value:
-            self.has_changed = True
-            super().set(section, option, value)
+        with self._lock:
+            orig_val = self.get(section, option, fallback=None)
+            value = str(value)
+            if orig_val is None or orig_val != value:
+                self.has_changed = True
+                super().set(section, option, value)
 
     add_section.__doc__ = ConfigParser.add_section.__doc__
     remove_section.__doc__ = ConfigParser.remove_section.__doc__
@@ -21,6 +21,10 @@ if not sys.platform.startswith('win'):
 freeze_support()
 
 if __name__ == '__main__':
+    # If enabled, this records the time taken by every import after this.
+    import startup_profile
+    startup_profile.install()
+
     import srctools.logger
     from app import on_error, TK_ROOT
     import utils
@@ -42,6 +46,10 @@ if __name__ == '__main__':
     )
     utils.setup_localisations(LOGGER)
 
+    # Save config changes in the background, so the UI isn't held up.
+    import BEE2_config
+    BEE2_config.enable_write_behind()
+
     LOGGER.info('Arguments: {}', sys.argv)
     LOGGER.info('Running "{}", version {}:', app_name, utils.BEE_VERSION)
 
@@ -7,6 +7,7 @@ import loadScreen
 import packageLoader
 import utils
 import srctools.logger
+import startup_profile
 
 LOGGER = srctools.logger.get_logger('BEE2')
 
@@ -45,11 +46,12 @@ DEFAULT_SETTINGS = {
     },
 }
 
-GEN_OPTS.load()
-GEN_OPTS.set_defaults(DEFAULT_SETTINGS)
+with startup_profile.phase('Load settings'):
+    GEN_OPTS.load()
+    GEN_OPTS.set_defaults(DEFAULT_SETTINGS)
 
 LOGGER.debug('Starting loading screen...')
-loadScreen.main_loader.set_length('UI', 15)
+loadScreen.main_loader.set_length('UI', 13)
 loadScreen.set_force_ontop(GEN_OPTS.get_bool('General', 'splash_stay_ontop'))
 loadScreen.show_main_loader(GEN_OPTS.get_bool('General', 'compact_splash'))
 
@@ -64,50 +66,58 @@ logWindow.init(
 
 LOGGER.debug('Loading settings...')
 
-UI.load_settings()
+with startup_profile.phase('UI.load_settings'):
+    UI.load_settings()
 
-gameMan.load()
-gameMan.set_game_by_name(
-    GEN_OPTS.get_val('Last_Selected', 'Game', ''),
-    )
-gameMan.scan_music_locs()
+with startup_profile.phase('gameMan.load'):
+    gameMan.load()
+    gameMan.set_game_by_name(
+        GEN_OPTS.get_val('Last_Selected', 'Game', ''),
+        )
+    gameMan.scan_music_locs()
 
 LOGGER.info('Loading Packages...')
-pack_data, package_sys = packageLoader.load_packages(
-    GEN_OPTS['Directories']['package'],
-    loader=loadScreen.main_loader,
-    log_item_fallbacks=GEN_OPTS.get_bool(
-        'Debug', 'log_item_fallbacks'),
-    log_missing_styles=GEN_OPTS.get_bool(
-        'Debug', 'log_missing_styles'),
-    log_missing_ent_count=GEN_OPTS.get_bool(
-        'Debug', 'log_missing_ent_count'),
-    log_incorrect_packfile=GEN_OPTS.get_bool(
-        'Debug', 'log_incorrect_packfile'),
-    has_tag_music=gameMan.MUSIC_TAG_LOC is not None,
-    has_mel_music=gameMan.MUSIC_MEL_VPK is not None,
-)
+with startup_profile.phase('load_packages'):
+    pack_data, package_sys = packageLoader.load_packages(
+        GEN_OPTS['Directories']['package'],
+        loader=loadScreen.main_loader,
+        log_item_fallbacks=GEN_OPTS.get_bool(
+            'Debug', 'log_item_fallbacks'),
+        log_missing_styles=GEN_OPTS.get_bool(
+            'Debug', 'log_missing_styles'),
+        log_missing_ent_count=GEN_OPTS.get_bool(
+            'Debug', 'log_missing_ent_count'),
+        log_incorrect_packfile=GEN_OPTS.get_bool(
+            'Debug', 'log_incorrect_packfile'),
+        has_tag_music=gameMan.MUSIC_TAG_LOC is not None,
+        has_mel_music=gameMan.MUSIC_MEL_VPK is not None,
+    )
 
-# Load filesystems into various modules
-music_conf.load_filesystems(package_sys)
-img.load_filesystems(package_sys)
-gameMan.load_filesystems(package_sys)
+    # Load filesystems into various modules
+    music_conf.load_filesystems(package_sys)
+    img.load_filesystems(package_sys)
+    gameMan.load_filesystems(package_sys)
 
-UI.load_packages(pack_data)
+with startup_profile.phase('UI.load_packages'):
+    UI.load_packages(pack_data)
 LOGGER.info('Done!')
 
 LOGGER.info('Loading Palettes...')
-paletteLoader.load_palettes()
+with startup_profile.phase('load_palettes'):
+    paletteLoader.load_palettes()
 LOGGER.info('Done!')
 
 # Check games for Portal 2's basemodui.txt file, so we can translate items.
 LOGGER.info('Loading Item Translations...')
-for game in gameMan.all_games:
-    game.init_trans()
+with startup_profile.phase('init_trans'):
+    for game in gameMan.all_games:
+        game.init_trans()
 
 LOGGER.info('Initialising UI...')
-UI.init_windows()  # create all windows
+with startup_profile.phase('UI.init_windows'):
+    UI.init_windows()  # create all windows
 LOGGER.info('UI initialised!')
+startup_profile.write_report()
 
 loadScreen.main_loader.destroy()
 # Delay this until the loop has actually run.
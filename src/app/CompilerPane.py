@@ -10,6 +10,7 @@ from app import selector_win, TK_ROOT
 from app import tkMarkdown, SubPane, img
 import utils
 from BEE2_config import ConfigFile, option_handler
+from compile_progress import PROGRESS_FILENAME
 from packageLoader import CORRIDOR_COUNTS, CorrDesc
 from srctools import Property, AtomicWriter
 from srctools.logger import get_logger
@@ -69,8 +70,13 @@ PLAYER_MODELS = {
 PLAYER_MODEL_ORDER = ['PETI', 'SP', 'ATLAS', 'PBODY']
 PLAYER_MODELS_REV = {value: key for key, value in PLAYER_MODELS.items()}
 
-COMPILE_CFG = ConfigFile('compile.cfg')
+# VBSP reads this, so it needs to be up to date.
+COMPILE_CFG = ConfigFile('compile.cfg', write_behind=False)
 COMPILE_CFG.set_defaults(COMPILE_DEFAULTS)
+# Written to by the compiler while it's running.
+PROGRESS_CFG = ConfigFile(PROGRESS_FILENAME, auto_load=False)
+# How often to check that for changes, in milliseconds.
+PROGRESS_POLL = 1000
 window = None
 UI = {}  # type: Dict[str, Widget]
 
@@ -111,6 +117,11 @@ count_brush.should_flash = False
 count_entity.should_flash = False
 count_overlay.should_flash = False
 
+# The current compiler stage, if one is running.
+compile_stage = StringVar(value='')
+# The last modification time of the progress file.
+_progress_mtime = 0.0
+
 # The data for the 3 progress bars -
 # (variable, config_name, default_max, description)
 COUNT_CATEGORIES = [
@@ -394,6 +405,39 @@ def refresh_counts(reload=True):
         flash_count()
 
 
+def poll_progress() -> None:
+    """Check the progress file, and show the state of any running compile."""
+    global _progress_mtime
+    TK_ROOT.after(PROGRESS_POLL, poll_progress)
+    try:
+        mtime = PROGRESS_CFG.filename.stat().st_mtime
+    except OSError:
+        return
+    if mtime == _progress_mtime:
+        return
+    _progress_mtime = mtime
+
+    PROGRESS_CFG.load()
+    progress = PROGRESS_CFG['Progress']
+    compiler = progress.get('compiler', '').upper()
+    state = progress.get('state', '')
+    stage = progress.get('stage', '')
+
+    if state == 'running':
+        if stage:
+            compile_stage.set('{}: {}'.format(compiler, stage))
+        else:
+            compile_stage.set(compiler)
+    elif state == 'failed':
+        compile_stage.set(_('{} failed!').format(compiler))
+    else:
+        compile_stage.set('')
+
+    if compiler == 'VBSP' and state != 'running':
+        # VBSP has written the new counts.
+        refresh_counts()
+
+
 def set_pack_dump_dir(path: str) -> None:
     COMPILE_CFG['General']['packfile_dump_dir'] = path
     COMPILE_CFG.save_check()
@@ -756,11 +800,18 @@ def make_comp_widgets(frame: ttk.Frame):
     )
     UI['count_brush'].grid(row=3, column=2, sticky=EW, padx=5)
 
+    ttk.Label(
+        count_frame,
+        textvariable=compile_stage,
+        anchor=CENTER,
+    ).grid(row=4, column=0, columnspan=3, sticky=EW)
+
     for wid_name in ('count_overlay', 'count_entity', 'count_brush'):
         # Add in tooltip logic to the widgets.
         add_tooltip(UI[wid_name])
 
     refresh_counts(reload=False)
+    poll_progress()
 
 
 def make_map_widgets(frame: ttk.Frame):
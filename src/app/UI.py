@@ -4,6 +4,7 @@ from tkinter import ttk  # themed ui components that match the OS
 from tkinter import messagebox  # simple, standard modal dialogs
 import itertools
 import operator
+import sys
 import random
 import math
 
@@ -25,7 +26,6 @@ import consts
 from app import (
     tk_tools,
     SubPane,
-    voiceEditor,
     contextWin,
     gameMan,
     packageMan,
@@ -34,7 +34,6 @@ from app import (
     tagsPane,
     optionWindow,
     helpMenu,
-    backup as backup_win,
     tooltip,
     signage_ui,
 )
@@ -433,9 +432,15 @@ class PalItem(Label):
         return '<' + str(self.id) + ":" + str(self.subKey) + '>'
 
 
+def show_backup_window() -> None:
+    """Open the backup window, importing it the first time."""
+    from app import backup
+    backup.show_window()
+
+
 def quit_application() -> None:
     """Do a last-minute save of our config files, and quit the app."""
-    import sys, logging
+    import logging
 
     LOGGER.info('Shutting down application.')
 
@@ -450,6 +455,9 @@ def quit_application() -> None:
     item_opts.save_check()
     CompilerPane.COMPILE_CFG.save_check()
     gameMan.save()
+    # Write anything waiting to be saved in the background now, while
+    # logging still works.
+    BEE2_config.flush_saves()
 
     # Destroy the TK windows, finalise logging, then quit.
     logging.shutdown()
@@ -579,7 +587,10 @@ def load_packages(data):
         The configuration button is disabled when no music is selected.
         """
         # This might be open, so force-close it to ensure it isn't corrupt...
-        voiceEditor.save()
+        # If it's not imported yet, it can't have been opened.
+        voiceEditor = sys.modules.get('app.voiceEditor')
+        if voiceEditor is not None:
+            voiceEditor.save()
         try:
             if style_id is None:
                 UI['conf_voice'].state(['disabled'])
@@ -761,7 +772,7 @@ def refresh_pal_ui() -> None:
     listbox.delete(0, END)
 
     for i, pal in enumerate(paletteLoader.pal_list):
-        if pal.settings is not None:
+        if pal.has_settings:
             listbox.insert(i, CHR_GEAR + pal.name)
         else:
             listbox.insert(i, pal.name)
@@ -797,7 +808,7 @@ def refresh_pal_ui() -> None:
     for val, pal in enumerate(paletteLoader.pal_list):
         menus['pal'].add_radiobutton(
             label=(
-                pal.name if pal.settings is None
+                pal.name if not pal.has_settings
                 else CHR_GEAR + pal.name
             ),
             variable=selectedPalette_radio,
@@ -1404,6 +1415,7 @@ def init_option(pane: SubPane) -> None:
         except KeyError:
             pass
         else:
+            from app import voiceEditor
             voiceEditor.show(chosen_voice)
     for ind, name in enumerate([
             _("Style: "),
@@ -1714,7 +1726,7 @@ def init_menu_bar(win: Toplevel) -> Menu:
         )
     file_menu.add_command(
         label=_("Backup/Restore Puzzles..."),
-        command=backup_win.show_window,
+        command=show_backup_window,
     )
     file_menu.add_command(
         label=_("Manage Packages..."),
@@ -1966,10 +1978,8 @@ def init_windows() -> None:
     utils.bind_leftclick(windows['opt'], contextWin.hide_context)
     utils.bind_leftclick(windows['pal'], contextWin.hide_context)
 
-    backup_win.init_toplevel()
-    loader.step('UI')
-    voiceEditor.init_widgets()
-    loader.step('UI')
+    # The backup and voice editor windows are rarely used, so they're
+    # created when first opened.
     contextWin.init_widgets()
     loader.step('UI')
     optionWindow.init_widgets()
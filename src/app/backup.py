@@ -550,6 +550,9 @@ def refresh_back_details():
 
 
 def show_window() -> None:
+    """Show the window when embedded in the BEE2, creating it the first time."""
+    if not UI:
+        init_toplevel()
     window.deiconify()
     window.lift()
     utils.center_win(window, TK_ROOT)
@@ -17,15 +17,16 @@ import math
 import re
 import io
 
-from BEE2_config import ConfigFile, GEN_OPTS
+from BEE2_config import ConfigFile, GEN_OPTS, flush_saves
 from srctools import (
     Vec, VPK,
     Property,
     VMF, Output,
-    FileSystem, FileSystemChain,
+    FileSystem,
 )
 import srctools.logger
-from app import backup, optionWindow, tk_tools, TK_ROOT
+from app import optionWindow, tk_tools, TK_ROOT
+from app.indexed_fsys import IndexedChain
 import loadScreen
 import packageLoader
 import utils
@@ -72,6 +73,22 @@ _UNLOCK_ITEMS = [
     'ITEM_OBSERVATION_ROOM'
     ]
 
+# If there are multiple of these blocks in vbsp_config, they're merged
+# together when written. They will end up in this order.
+VBSP_MERGED_BLOCKS = [
+    'Textures',
+    'Fizzlers',
+    'Options',
+    'StyleVars',
+    'DropperItems',
+    'Conditions',
+    'Quotes',
+    'PackTriggers',
+]
+
+# When writing configs, pass text to the file in chunks of about this many lines.
+WRITE_CHUNK_LINES = 4096
+
 # Material file used for fizzler sides.
 # We use $decal because that ensures it's displayed over brushes,
 # if there's base slabs or the like.
@@ -120,7 +137,8 @@ EDITOR_SOUND_LINE = '// BEE2 SOUNDS BELOW'
 # The progress bars used when exporting data into a game
 export_screen = loadScreen.LoadScreen(
     ('BACK', 'Backup Original Files'),
-    (backup.AUTO_BACKUP_STAGE, 'Backup Puzzles'),
+    # This matches backup.AUTO_BACKUP_STAGE, that's imported when exporting.
+    ('BACKUP_ZIP', 'Backup Puzzles'),
     ('EXP', 'Export Configuration'),
     ('COMP', 'Copy Compiler'),
     ('RES', 'Copy Resources'),
@@ -136,7 +154,7 @@ EXE_SUFFIX = (
 )
 
 # The systems we need to copy to ingame resources
-res_system = FileSystemChain()
+res_system = IndexedChain()
 
 # We search for Tag and Mel's music files, and copy them to games on export.
 # That way they can use the files.
@@ -602,6 +620,9 @@ class Game:
         LOGGER.info('-' * 20)
         LOGGER.info('Exporting Items and Style for "{}"!', self.name)
 
+        # Make sure the compiler sees the current settings.
+        flush_saves()
+
         LOGGER.info('Style = {}', style.id)
         for obj, selected in selected_objects.items():
             # Skip the massive dict in items
@@ -651,6 +672,9 @@ class Game:
         try:
 
             if should_refresh:
+                # Packages may have been edited since the last export, so
+                # list the files again.
+                res_system.clear_index()
                 # Count the files.
                 export_screen.set_length(
                     'RES',
@@ -694,19 +718,6 @@ class Game:
             vbsp_config.set_key(('Options', 'Game_ID'), self.steamID)
             vbsp_config.set_key(('Options', 'dev_mode'), srctools.bool_as_int(optionWindow.DEV_MODE.get()))
 
-            # If there are multiple of these blocks, merge them together.
-            # They will end up in this order.
-            vbsp_config.merge_children(
-                'Textures',
-                'Fizzlers',
-                'Options',
-                'StyleVars',
-                'DropperItems',
-                'Conditions',
-                'Quotes',
-                'PackTriggers',
-            )
-
             for name, file, ext in FILES_TO_BACKUP:
                 item_path = self.abs_path(file + ext)
                 backup_path = self.abs_path(file + '_original' + ext)
@@ -763,6 +774,7 @@ class Game:
                 export_screen.step('BACK')
 
             # Backup puzzles, if desired
+            from app import backup
             backup.auto_backup(selected_game, export_screen)
 
             # This is the connection "heart" and "error" models.
@@ -807,15 +819,14 @@ class Game:
             LOGGER.info('Writing Editoritems...')
             with srctools.AtomicWriter(self.abs_path(
                     'portal2_dlc2/scripts/editoritems.txt')) as editor_file:
-                for line in editoritems.export():
-                    editor_file.write(line)
+                write_props(editor_file, editoritems)
             export_screen.step('EXP')
 
             LOGGER.info('Writing VBSP Config!')
             os.makedirs(self.abs_path('bin/bee2/'), exist_ok=True)
             with open(self.abs_path('bin/bee2/vbsp_config.cfg'), 'w', encoding='utf8') as vbsp_file:
-                for line in vbsp_config.export():
-                    vbsp_file.write(line)
+                # The duplicate blocks are merged as they're written.
+                write_props(vbsp_file, vbsp_config, VBSP_MERGED_BLOCKS)
             export_screen.step('EXP')
 
             if num_compiler_files > 0:
@@ -1277,6 +1288,67 @@ def scan_music_locs():
             break
 
 
+def write_props(
+    file: io.TextIOBase,
+    tree: Property,
+    merge: Iterable[str]=(),
+) -> None:
+    """Write a property tree to a file, in the same format as Property.export().
+
+    The lines are built directly at their indentation level, instead of
+    passing through a generator for each parent block, and are written
+    to the file in large chunks.
+
+    Blocks at the root with a name in merge are combined into one, placed
+    after the other blocks in the given order. This produces the same result
+    as tree.merge_children(*merge), without building a new tree.
+    """
+    merged = {name.casefold(): (name, []) for name in merge}  # type: Dict[str, Tuple[str, List[Property]]]
+    parts = []  # type: List[str]
+
+    def add(prop: Property, indent: str) -> None:
+        """Add the lines for this property."""
+        if prop.has_children():
+            if prop.real_name is None:
+                for child in prop:
+                    add(child, indent)
+                return
+            parts.append('{0}"{1}"\n{0}\t{{\n'.format(indent, prop.real_name))
+            for child in prop:
+                add(child, indent + '\t')
+            parts.append(indent + '\t}\n')
+        else:
+            parts.append('{}"{}" "{}"\n'.format(
+                indent,
+                prop.real_name,
+                prop.value.replace('"', '\\"'),
+            ))
+
+    def flush(force: bool=False) -> None:
+        """Pass the lines on to the file, if we have enough."""
+        if parts and (force or len(parts) >= WRITE_CHUNK_LINES):
+            file.write(''.join(parts))
+            parts.clear()
+
+    for prop in tree:
+        if prop.has_children() and prop.name in merged:
+            merged[prop.name][1].append(prop)
+            continue
+        add(prop, '')
+        flush()
+
+    for name, blocks in merged.values():
+        if not any(block.value for block in blocks):
+            continue
+        parts.append('"{}"\n\t{{\n'.format(name))
+        for block in blocks:
+            for child in block:
+                add(child, '\t')
+            flush()
+        parts.append('\t}\n')
+    flush(force=True)
+
+
 def improve_item(item: Property) -> None:
     """Improve editoritems formats in various ways.
 
@@ -1,6 +1,6 @@
 """Help menu and associated dialogs."""
 from enum import Enum
-from typing import NamedTuple
+from typing import NamedTuple, Optional
 
 from tkinter import ttk
 import tkinter as tk
@@ -269,10 +269,17 @@ def make_help_menu(parent: tk.Menu):
     }
     icons[ResIcon.NONE] = invis_icon
 
-    credits = Dialog(
-        title=_('BEE2 Credits'),
-        text=CREDITS_TEXT,
-    )
+    credits = None  # type: Optional[Dialog]
+
+    def show_credits() -> None:
+        """Show the credits, creating the window the first time."""
+        nonlocal credits
+        if credits is None:
+            credits = Dialog(
+                title=_('BEE2 Credits'),
+                text=CREDITS_TEXT,
+            )
+        credits.show()
 
     for res in WEB_RESOURCES:
         if res is SEPERATOR:
@@ -288,5 +295,5 @@ def make_help_menu(parent: tk.Menu):
     help.add_separator()
     help.add_command(
         label=_('Credits...'),
-        command=credits.show,
+        command=show_credits,
     )
@@ -8,10 +8,11 @@ from PIL import ImageTk, Image, ImageDraw
 import os
 
 from srctools import Vec
-from srctools.filesys import FileSystem, RawFileSystem, FileSystemChain
+from srctools.filesys import FileSystem, RawFileSystem
 import srctools.logger
 import logging
 import utils
+from app.indexed_fsys import IndexedChain
 
 from typing import Iterable, Union, Dict, Tuple
 
@@ -21,7 +22,7 @@ cached_img = {}  # type: Dict[Tuple[str, int, int], ImageTk.PhotoImage]
 # r, g, b, size -> image
 cached_squares = {}  # type: Dict[Union[Tuple[float, float, float, int], Tuple[str, int]], ImageTk.PhotoImage]
 
-filesystem = FileSystemChain(
+filesystem = IndexedChain(
     # Highest priority is the in-built UI images.
     RawFileSystem(str(utils.install_path('images'))),
 )
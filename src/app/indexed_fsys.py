@@ -0,0 +1,92 @@
+"""A FileSystemChain which indexes the files in all its systems.
+
+The app looks up thousands of icons, sounds and resources in a chain of
+every package. Normally each lookup tries each package in turn, so instead
+all the filenames are listed once, and lookups use that first.
+"""
+from srctools.filesys import FileSystem, FileSystemChain, File
+import srctools.logger
+
+from typing import Optional, Dict, List, Iterator, Tuple
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+
+class IndexedChain(FileSystemChain):
+    """A FileSystemChain with a casefolded index of all the files.
+
+    The index is built the first time it's needed, and discarded if
+    another system is added. Files which aren't in the index are still
+    looked up normally, in case they were added afterwards. But if a file is
+    added to a system with higher priority than the one indexed for it, or
+    files are added or removed in a folder being walked, that isn't seen
+    until clear_index() is called.
+    """
+    def __init__(self, *systems) -> None:
+        super().__init__(*systems)
+        # Casefolded path -> file in the child system.
+        self._index = None  # type: Optional[Dict[str, File]]
+        # The path in the chain, and the file in the child system.
+        self._listing = []  # type: List[Tuple[str, File]]
+
+    def add_sys(self, sys: FileSystem, prefix: str='', **kwargs) -> None:
+        """Add a filesystem to the list, which discards the index."""
+        super().add_sys(sys, prefix, **kwargs)
+        self.clear_index()
+
+    def clear_index(self) -> None:
+        """Discard the index, so it's rebuilt when next used."""
+        self._index = None
+        self._listing = []
+
+    def _build_index(self) -> Dict[str, File]:
+        """Find all the files in our child systems."""
+        index = {}  # type: Dict[str, File]
+        listing = []  # type: List[Tuple[str, File]]
+        with self:
+            for child_sys, prefix in self.systems:
+                for file in child_sys.walk_folder(prefix):
+                    path = file.path[len(prefix):]
+                    listing.append((path, file))
+                    # Earlier systems have priority.
+                    index.setdefault(path.casefold(), file)
+        LOGGER.debug(
+            'Indexed {} files in {} systems.',
+            len(listing), len(self.systems),
+        )
+        self._index = index
+        self._listing = listing
+        return index
+
+    def _get_file(self, name: str) -> File:
+        """Find a file, using the index if possible.
+
+        If the file is indexed, that system is used even if a file was
+        added to an earlier system afterwards.
+        """
+        index = self._index
+        if index is None:
+            index = self._build_index()
+        try:
+            file = index[name.replace('\\', '/').casefold()]
+            info = file.sys._get_file(file.path)
+        except (KeyError, FileNotFoundError):
+            # Not in the index, or removed since. Check every system.
+            return super()._get_file(name)
+        return File(self, file.path, info)
+
+    def walk_folder_repeat(self, folder: str='') -> Iterator[File]:
+        """Yield all the files in this folder, in every system.
+
+        This uses the listing made for the index, so call clear_index()
+        first if the files may have changed.
+        """
+        if self._index is None:
+            self._build_index()
+        folder = folder.replace('\\', '/').strip('/').casefold()
+        if folder:
+            folder += '/'
+        for path, file in self._listing:
+            if path.casefold().startswith(folder):
+                yield File(self, path, file)
@@ -26,7 +26,11 @@ WidgetLookup = utils.FuncLookup('Widgets')
 # frame.
 WidgetLookupMulti = utils.FuncLookup('Multi-Widgets')
 
-CONFIG = BEE2_config.ConfigFile('item_cust_configs.cfg')
+CONFIG = BEE2_config.ConfigFile(
+    'item_cust_configs.cfg',
+    # VBSP reads this, so it needs to be up to date.
+    write_behind=False,
+)
 
 CONFIG_ORDER = []  # type: List[ConfigGroup]
 
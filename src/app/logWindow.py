@@ -3,7 +3,10 @@
 from tkinter import ttk
 import tkinter as tk
 
+from collections import deque
+from typing import Deque, Optional, Tuple
 import logging
+import time
 
 import srctools.logger
 from BEE2_config import GEN_OPTS
@@ -41,6 +44,15 @@ level_selector = None  # type: ttk.Combobox
 START = '1.0'  # Row 1, column 0 = first character
 END = tk.END
 
+# Records are buffered, then written to the widget in batches at most this
+# often (in milliseconds).
+FLUSH_DELAY = 100
+# The maximum number of records waiting to be written. If more arrive
+# before a flush, the oldest are discarded.
+MAX_PENDING = 2000
+# The maximum number of lines kept in the text box. Older lines are removed.
+MAX_LINES = 5000
+
 
 class TextHandler(logging.Handler):
     """Log all data to a Tkinter Text widget."""
@@ -69,52 +81,95 @@ class TextHandler(logging.Handler):
         )
 
         self.has_text = False
+        # (levelname, formatted text) pairs waiting to be written.
+        self.pending = deque(maxlen=MAX_PENDING)  # type: Deque[Tuple[str, str]]
+        # The after() ID for the scheduled flush, if any.
+        self._flush_id = None  # type: Optional[str]
+        self._last_flush = 0.0
 
         widget['state'] = "disabled"
 
     def emit(self, record: logging.LogRecord):
-        """Add a logging message."""
+        """Add a logging message.
+
+        The text is formatted immediately, but written to the widget in
+        batches to avoid redrawing it for every single record.
+        """
 
         msg = record.msg
         if isinstance(record.msg, srctools.logger.LogMessage):
             # Ensure we don't use the extra ASCII indents here.
             record.msg = record.msg.format_msg()
 
+        try:
+            self.pending.append((record.levelname, self.format(record)))
+        finally:
+            # Undo the record overwrite, so other handlers get the correct object.
+            record.msg = msg
+
+        if time.monotonic() - self._last_flush > FLUSH_DELAY / 1000:
+            # We might be busy with other stuff, so the Tk loop won't run
+            # timers. Write out immediately if it's been long enough.
+            self.flush_pending()
+        elif self._flush_id is None:
+            self._flush_id = self.widget.after(FLUSH_DELAY, self.flush_pending)
+
+    def flush_pending(self):
+        """Write all pending messages to the widget."""
+        if self._flush_id is not None:
+            self.widget.after_cancel(self._flush_id)
+            self._flush_id = None
+        self._last_flush = time.monotonic()
+        if not self.pending:
+            return
+
         self.widget['state'] = "normal"
-        # We don't want to indent the first line.
-        firstline, *lines = self.format(record).split('\n')
+        while self.pending:
+            levelname, text = self.pending.popleft()
+            # We don't want to indent the first line.
+            firstline, *lines = text.split('\n')
+
+            if self.has_text:
+                # Start with a newline so it doesn't end with one.
+                self.widget.insert(
+                    END,
+                    '\n',
+                    (),
+                )
 
-        if self.has_text:
-            # Start with a newline so it doesn't end with one.
             self.widget.insert(
                 END,
-                '\n',
-                (),
+                firstline,
+                (levelname,),
             )
+            for line in lines:
+                self.widget.insert(
+                    END,
+                    '\n',
+                    ('INDENT',),
+                    line,
+                    # Indent following lines.
+                    (levelname, 'INDENT'),
+                )
+            self.has_text = True
+
+        # Trim off old lines, so we don't grow forever.
+        line_count = int(self.widget.index('end-1c').split('.')[0])
+        if line_count > MAX_LINES:
+            self.widget.delete(START, '{}.0'.format(line_count - MAX_LINES + 1))
 
-        self.widget.insert(
-            END,
-            firstline,
-            (record.levelname,),
-        )
-        for line in lines:
-            self.widget.insert(
-                END,
-                '\n',
-                ('INDENT',),
-                line,
-                # Indent following lines.
-                (record.levelname, 'INDENT'),
-            )
         self.widget.see(END)  # Scroll to the end
         self.widget['state'] = "disabled"
         # Update it, so it still runs even when we're busy with other stuff.
         self.widget.update_idletasks()
 
-        self.has_text = True
-
-        # Undo the record overwrite, so other handlers get the correct object.
-        record.msg = msg
+    def clear(self):
+        """Remove all text, including pending messages."""
+        self.pending.clear()
+        self.widget['state'] = "normal"
+        self.widget.delete(START, END)
+        self.has_text = False
+        self.widget['state'] = "disabled"
 
 
 def set_visible(is_visible: bool):
@@ -138,10 +193,7 @@ def btn_copy():
 
 def btn_clear():
     """Clear the console."""
-    text_box['state'] = "normal"
-    text_box.delete(START, END)
-    log_handler.has_text = False
-    text_box['state'] = "disabled"
+    log_handler.clear()
 
 
 def set_level(event):
@@ -8,8 +8,9 @@ from packageLoader import Music
 from consts import MusicChannel
 from tkinter import ttk
 from app.selector_win import Item as SelItem, selWin as SelectorWin, AttrDef as SelAttr
-from srctools import FileSystemChain, FileSystem
+from srctools import FileSystem
 from app import TK_ROOT
+from app.indexed_fsys import IndexedChain
 import tkinter
 import srctools.logger
 
@@ -25,7 +26,7 @@ SEL_ITEMS = {}  # type: Dict[str, SelItem]
 
 is_collapsed = False
 
-filesystem = FileSystemChain()
+filesystem = IndexedChain()
 
 
 def load_filesystems(systems: Iterable[FileSystem]):
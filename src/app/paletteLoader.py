@@ -1,12 +1,13 @@
 import os
 import shutil
+import threading
 import zipfile
 import random
 import utils
 
 import srctools.logger
 import BEE2_config
-from srctools import Property, NoKeyError, KeyValError
+from srctools import Property, NoKeyError, KeyValError, AtomicWriter
 
 from typing import List, Tuple, Optional, Dict
 
@@ -17,6 +18,11 @@ PAL_DIR = utils.conf_location('palettes/')
 
 PAL_EXT = '.bee2_palette'
 
+# Lists the palette files, so they can be shown without parsing them all.
+PAL_INDEX = utils.conf_location('config/palettes.vdf')
+# Held while writing the index, in case it's written from several threads.
+_index_lock = threading.Lock()
+
 pal_list: List['Palette'] = []
 
 # Allow translating the names of the built-in palettes
@@ -195,7 +201,11 @@ DEFAULT_PALETTES: Dict[str, List[Tuple[str, int]]] = {
 
 
 class Palette:
-    """A palette, saving an arrangement of items for editoritems.txt"""
+    """A palette, saving an arrangement of items for editoritems.txt
+
+    Palettes listed from the index are only given their names - the items
+    and settings are parsed from the file when first used.
+    """
     def __init__(
         self,
         name,
@@ -218,49 +228,115 @@ class Palette:
         # None determines a filename automatically.
         self.filename = filename
         # List of id, index tuples.
-        self.pos = pos
+        self._pos = pos
         # If true, prevent overwriting the original file
         # (premade palettes or <LAST EXPORT>)
         self.prevent_overwrite = prevent_overwrite
 
         # If not None, settings associated with the palette.
-        self.settings = settings
+        self._settings = settings
+
+        # If False, pos and settings still need to be read from our file.
+        self._loaded = True
+        # Until then, whether the index says the file has settings.
+        self._has_settings = settings is not None
+        # The modification time and size of our file, when last read or
+        # written. This is recorded in the index.
+        self._stat = None  # type: Optional[Tuple[int, int]]
 
     def __str__(self):
         return self.name
 
+    @property
+    def pos(self) -> List[Tuple[str, int]]:
+        """The items in the palette."""
+        if not self._loaded:
+            self._load()
+        return self._pos
+
+    @pos.setter
+    def pos(self, value: List[Tuple[str, int]]) -> None:
+        if not self._loaded:
+            self._load()
+        self._pos = value
+
+    @property
+    def settings(self) -> Optional[Property]:
+        """If not None, settings associated with the palette."""
+        if not self._loaded:
+            self._load()
+        return self._settings
+
+    @settings.setter
+    def settings(self, value: Optional[Property]) -> None:
+        if not self._loaded:
+            self._load()
+        self._settings = value
+
+    @property
+    def has_settings(self) -> bool:
+        """Check if the palette has settings, without loading it."""
+        if self._loaded:
+            return self._settings is not None
+        return self._has_settings
 
     @classmethod
     def parse(cls, path: str):
+        stat = _file_stat(path)
         with open(path, encoding='utf8') as f:
             props = Property.parse(f, path)
         name = props['Name', '??']
-        items = []
-        for item in props.find_children('Items'):
-            items.append((item.real_name, int(item.value)))
-
         trans_name = props['TransName', '']
 
-        try:
-            settings = props.find_key('Settings')
-        except NoKeyError:
-            settings = None
-
-        return Palette(
+        pal = Palette(
             name,
-            items,
+            _parse_items(props),
             trans_name=trans_name,
             prevent_overwrite=props.bool('readonly'),
             filename=os.path.basename(path),
-            settings=settings,
+            settings=_parse_settings(props),
         )
+        pal._stat = stat
+        return pal
 
-    def save(self, ignore_readonly=False):
+    @classmethod
+    def from_index(cls, entry: Property, stat: Tuple[int, int]) -> 'Palette':
+        """Make a palette from its index entry, which is loaded when used."""
+        pal = Palette(
+            entry['name', '??'],
+            [],
+            trans_name=entry['transname', ''],
+            prevent_overwrite=entry.bool('readonly'),
+            filename=entry['file'],
+        )
+        pal._loaded = False
+        pal._has_settings = entry.bool('settings')
+        pal._stat = stat
+        return pal
+
+    def _load(self) -> None:
+        """Read the items and settings from our file, now they're needed."""
+        self._loaded = True
+        path = os.path.join(PAL_DIR, self.filename)
+        LOGGER.info('Loading "{}"', path)
+        try:
+            with open(path, encoding='utf8') as f:
+                props = Property.parse(f, path)
+        except (OSError, KeyValError):
+            LOGGER.warning('Could not load palette "{}"!', path, exc_info=True)
+            self._pos = []
+            self._settings = None
+            return
+        self._pos = _parse_items(props)
+        self._settings = _parse_settings(props)
+
+    def save(self, ignore_readonly=False, update_index=True):
         """Save the palette file into the specified location.
 
         If ignore_readonly is true, this will ignore the `prevent_overwrite`
         property of the palette (allowing resaving those properties over old
         versions). Otherwise those palettes always create a new file.
+        If update_index is false, the palette index isn't rewritten.
         """
         LOGGER.info('Saving "{}"!', self.name)
         props = Property(None, [
@@ -307,15 +383,94 @@ class Palette:
         with file:
             for line in props.export():
                 file.write(line)
+        self._stat = _file_stat(os.path.join(PAL_DIR, self.filename))
+        if update_index:
+            save_index()
 
     def delete_from_disk(self):
         """Delete this palette from disk."""
         if self.filename is not None:
             os.remove(os.path.join(PAL_DIR, self.filename))
+            self._stat = None
+            save_index()
+
+
+def _parse_items(props: Property) -> List[Tuple[str, int]]:
+    """Read the item list from a palette file."""
+    return [
+        (item.real_name, int(item.value))
+        for item in props.find_children('Items')
+    ]
+
+
+def _parse_settings(props: Property) -> Optional[Property]:
+    """Read the settings saved in a palette file, if present."""
+    try:
+        return props.find_key('Settings')
+    except NoKeyError:
+        return None
+
+
+def _file_stat(path: str) -> Tuple[int, int]:
+    """Return the modification time and size of a file.
+
+    If either changes, the index entry for it is out of date.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_index() -> Dict[str, Property]:
+    """Read the palette index, returning filename -> entry."""
+    try:
+        with open(PAL_INDEX, encoding='utf8') as f:
+            props = Property.parse(f, str(PAL_INDEX))
+    except FileNotFoundError:
+        return {}
+    except (OSError, KeyValError):
+        LOGGER.warning('Could not read palette index!', exc_info=True)
+        return {}
+    return {
+        entry['file', '']: entry
+        for entry in props.find_all('Palettes', 'Palette')
+    }
+
+
+def save_index() -> None:
+    """Write out the names of all the palette files, with their sizes.
+
+    This lets the palettes be listed next time without parsing every file.
+    """
+    with _index_lock:
+        props = Property('Palettes', [])
+        for pal in list(pal_list):
+            if pal.filename is None or pal._stat is None:
+                continue
+            mtime, size = pal._stat
+            props.append(Property('Palette', [
+                Property('file', os.path.basename(pal.filename)),
+                Property('mtime', str(mtime)),
+                Property('size', str(size)),
+                # Translated names are looked up again, like in the file.
+                Property('name', '' if pal.trans_name else pal.name),
+                Property('transname', pal.trans_name),
+                Property('readonly', srctools.bool_as_int(pal.prevent_overwrite)),
+                Property('settings', srctools.bool_as_int(pal.has_settings)),
+            ]))
+        try:
+            with AtomicWriter(str(PAL_INDEX), encoding='utf8') as file:
+                for line in props.export():
+                    file.write(line)
+        except OSError:
+            LOGGER.warning('Could not write palette index!', exc_info=True)
 
 
 def load_palettes():
-    """Scan and read in all palettes in the specified directory."""
+    """Scan and read in all palettes in the specified directory.
+
+    Palettes which haven't changed since the index was written are only
+    read when they're used.
+    """
 
     # Load our builtin palettes.
     for name, items in DEFAULT_PALETTES.items():
@@ -327,12 +482,31 @@ def load_palettes():
             prevent_overwrite=True,
         ))
 
+    index = read_index()
+    # If any palettes were added, changed or removed, resave the index.
+    index_changed = False
+    legacy = []  # type: List[Tuple[Palette, str]]
+
     for name in os.listdir(PAL_DIR):  # this is both files and dirs
-        LOGGER.info('Loading "{}"', name)
         path = os.path.join(PAL_DIR, name)
         pos_file, prop_file = None, None
         try:
             if name.endswith(PAL_EXT):
+                try:
+                    stat = _file_stat(path)
+                except OSError:
+                    LOGGER.warning('Could not read palette "{}"!', name)
+                    continue
+                try:
+                    entry = index.pop(name)
+                except KeyError:
+                    pass
+                else:
+                    if (entry['mtime', ''], entry['size', '']) == tuple(map(str, stat)):
+                        pal_list.append(Palette.from_index(entry, stat))
+                        continue
+                LOGGER.info('Loading "{}"', name)
+                index_changed = True
                 try:
                     pal_list.append(Palette.parse(path))
                 except KeyValError as exc:
@@ -361,28 +535,53 @@ def load_palettes():
             pal = parse_legacy(pos_file, prop_file, name)
             if pal is not None:
                 pal_list.append(pal)
+                legacy.append((pal, path))
+                if not name.endswith('.zip'):
+                    # Folders can't be overwritten...
+                    pal.prevent_overwrite = True
         finally:
             if pos_file:
                 pos_file.close()
             if prop_file:
                 prop_file.close()
 
-        LOGGER.warning('"{}" is a legacy palette - resaving!', name)
-        # Resave with the new format, then delete originals.
-        if name.endswith('.zip'):
-            pal.save()
-            os.remove(path)
-        else:
-            # Folders can't be overwritten...
-            pal.prevent_overwrite = True
-            pal.save()
-            shutil.rmtree(path)
+    if index or index_changed:
+        # Some were removed, or need to be added.
+        save_index()
 
     # Ensure the list has a defined order..
     pal_list.sort(key=str)
+
+    if legacy:
+        # The palettes are already in the list, the conversion can be done
+        # while the rest of the app loads.
+        threading.Thread(
+            target=_convert_legacy,
+            args=(legacy, ),
+            name='palette_convert',
+        ).start()
     return pal_list
 
 
+def _convert_legacy(legacy: List[Tuple[Palette, str]]) -> None:
+    """Resave legacy palettes with the new format, then delete the originals.
+
+    This runs in the background, so it doesn't touch pal_list - the UI may
+    be using that. The new files are added to the index when it's next
+    written.
+    """
+    for pal, path in legacy:
+        LOGGER.warning('"{}" is a legacy palette - resaving!', path)
+        try:
+            pal.save(update_index=False)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            LOGGER.warning('Could not convert "{}"!', path, exc_info=True)
+
+
 def parse_legacy(posfile, propfile, path):
     """Parse the original BEE2.2 palette format."""
     props = Property.parse(propfile, path + ':properties.txt')
@@ -5,13 +5,19 @@ If PyGame fails to load, all fx() calls will fail silently.
 (Sounds are not critical to the app, so they just won't play.)
 """
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from zipfile import ZipFile
 from tkinter import Event
-from typing import IO, Optional, Callable, Union, Dict
+from typing import Optional, Callable, Union, Dict
 
 import utils
 
 from app import TK_ROOT
-from srctools.filesys import FileSystemChain, FileSystem, RawFileSystem
+from srctools.filesys import FileSystemChain, RawFileSystem, ZipFileSystem
 import srctools.logger
 
 __all__ = [
@@ -26,6 +32,12 @@ LOGGER = srctools.logger.get_logger(__name__)
 
 play_sound = True
 
+# The number of music samples to keep in memory, so replaying them doesn't
+# need to read them from the packages again.
+SAMPLE_CACHE_SIZE = 8
+# How often to check if a music sample has finished loading, in milliseconds.
+SAMPLE_POLL = 50
+
 # This starts holding the filenames, but then caches the actual sound object.
 SOUNDS: Dict[str, Union[str, 'Source']] = {
     'select': 'rollover',
@@ -91,29 +103,53 @@ else:
     initiallised = True
     _play_repeat_sfx = True
 
+    # Decodes sounds and reads music samples, so the UI doesn't freeze.
+    _POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sound')
+    # Filename -> the sound being decoded for it.
+    _FX_LOADS: Dict[str, 'Future[Source]'] = {}
+    # Music filename -> file data, for samples not in raw folders.
+    _SAMPLE_CACHE: 'OrderedDict[str, bytes]' = OrderedDict()
+    _SAMPLE_LOCK = threading.Lock()
+
+    def _decode_fx(fname: str) -> Source:
+        """Decode a sound effect. This runs in the background."""
+        LOGGER.info('Loading sound sounds/{}.ogg', fname)
+        return pyglet.media.load(
+            str(utils.install_path('sounds/{}.ogg'.format(fname))),
+            streaming=False,
+        )
+
+    def _load_fx(fname: str) -> 'Future[Source]':
+        """Start decoding a sound effect, if that hasn't been done already."""
+        try:
+            return _FX_LOADS[fname]
+        except KeyError:
+            future = _FX_LOADS[fname] = _POOL.submit(_decode_fx, fname)
+            return future
+
     def load_snd() -> None:
-        """Load all the sounds."""
-        for name, fname in SOUNDS.items():
-            LOGGER.info('Loading sound "{}" -> sounds/{}.ogg', name, fname)
-            SOUNDS[name] = pyglet.media.load(
-                str(utils.install_path('sounds/{}.ogg'.format(fname))),
-                streaming=False,
-            )
+        """Start decoding all the sounds in the background."""
+        for fname in SOUNDS.values():
+            if isinstance(fname, str):
+                _load_fx(fname)
 
     def fx(name, e=None):
         """Play a sound effect stored in the sounds{} dict."""
         if not play_sound:
             return
-        # Defer loading these until we actually need them, speeds up
-        # startup a little.
         try:
             sound = SOUNDS[name]
         except KeyError:
             raise ValueError(f'Not a valid sound? "{name}"')
-        if type(sound) is str:
-            LOGGER.warning('load_snd() not called when playing "{}"?', name)
-        else:
-            sound.play()
+        if isinstance(sound, str):
+            # Not decoded yet, wait for it to finish. If load_snd()
+            # wasn't called this decodes it now.
+            try:
+                sound = SOUNDS[name] = _load_fx(sound).result()
+            except (MediaDecodeException, MediaFormatException, OSError):
+                LOGGER.exception('Could not load sound "{}"!', name)
+                return
+        sound.play()
 
 
     def _reset_fx_blockable() -> None:
@@ -150,6 +186,45 @@ else:
     ticker_cmd = ('after', 150, TK_ROOT.register(ticker))
     TK_ROOT.tk.call(ticker_cmd)
 
+    def _cache_sample(filename: str, data: bytes) -> None:
+        """Keep the data for a music sample, in case it's played again."""
+        with _SAMPLE_LOCK:
+            _SAMPLE_CACHE[filename] = data
+            while len(_SAMPLE_CACHE) > SAMPLE_CACHE_SIZE:
+                _SAMPLE_CACHE.popitem(last=False)
+
+    def _decode_sample(filename: str, data: bytes) -> Source:
+        """Decode a music sample from memory. This runs in the background."""
+        LOGGER.debug('Loading music "{}" from memory', filename)
+        return pyglet.media.load(filename, BytesIO(data))
+
+    def _load_raw_sample(path: str) -> Source:
+        """Load a music sample from a raw file. This runs in the background."""
+        LOGGER.debug('Loading music directly from {!r}', path)
+        return pyglet.media.load(path)
+
+    def _load_zip_sample(filename: str, zip_path: str, path: str) -> Source:
+        """Load a music sample from a zip. This runs in the background.
+
+        The zip is opened again, so the package's ZipFile isn't shared
+        between threads.
+        """
+        with ZipFile(zip_path) as zip_file:
+            try:
+                info = zip_file.getinfo(path)
+            except KeyError:
+                # srctools ignores case when looking up files.
+                folded = path.casefold()
+                for info in zip_file.infolist():
+                    if info.filename.casefold() == folded:
+                        break
+                else:
+                    raise FileNotFoundError(path) from None
+            data = zip_file.read(info)
+        # Read it all in, so we don't need to keep the package open.
+        _cache_sample(filename, data)
+        return _decode_sample(filename, data)
+
     class SamplePlayer:
         """Handles playing a single audio file, and allows toggling it on/off."""
         def __init__(
@@ -166,67 +241,92 @@ else:
             self.start_callback: Callable[[], None] = start_callback
             self.stop_callback: Callable[[], None] = stop_callback
             self.cur_file: Optional[str] = None
-            # The system we need to cleanup.
-            self._handle: Optional[IO[bytes]] = None
-            self._cur_sys: Optional[FileSystem] = None
+            # If set, the sample is being loaded in the background.
+            self._loading: Optional['Future[Source]'] = None
             self.system: FileSystemChain = system
 
         @property
         def is_playing(self):
-            """Is the player currently playing sounds?"""
-            return self.sample is not None
+            """Is the player currently playing (or loading) sounds?"""
+            return self.sample is not None or self._loading is not None
 
-        def _close_handles(self) -> None:
-            """Close down previous sounds."""
-            if self._handle is not None:
-                self._handle.close()
-            if self._cur_sys is not None:
-                self._cur_sys.close_ref()
-            self._handle = self._cur_sys = None
+        def _find_sample(self, filename: str) -> Callable[[], Source]:
+            """Find a music sample, and return a function to load it.
+
+            The package filesystems are shared with the rest of the app, and
+            aren't thread-safe. So this looks up the file on the main thread,
+            and the function only reads it using its own file handle.
+            """
+            with _SAMPLE_LOCK:
+                data = _SAMPLE_CACHE.get(filename)
+                if data is not None:
+                    _SAMPLE_CACHE.move_to_end(filename)
+                    return partial(_decode_sample, filename, data)
+
+            with self.system:
+                file = self.system[filename]
+                child_sys = self.system.get_system(file)
+                # Special case raw filesystems - Pyglet is more efficient
+                # if it can just open the file itself.
+                if isinstance(child_sys, RawFileSystem):
+                    return partial(
+                        _load_raw_sample,
+                        os.path.join(child_sys.path, file.path),
+                    )
+                if isinstance(child_sys, ZipFileSystem):
+                    return partial(
+                        _load_zip_sample,
+                        filename, child_sys.path, file.path,
+                    )
+                # Otherwise read it all in here.
+                with file.open_bin() as f:
+                    data = f.read()
+            _cache_sample(filename, data)
+            return partial(_decode_sample, filename, data)
 
         def play_sample(self, e: Event=None) -> None:
-            pass
             """Play a sample of music.
 
             If music is being played it will be stopped instead.
+            The sample is loaded in the background, then played.
             """
             if self.cur_file is None:
                 return
 
-            if self.sample is not None:
+            if self.sample is not None or self._loading is not None:
                 self.stop()
                 return
 
-            self._close_handles()
-
-            with self.system:
-                try:
-                    file = self.system[self.cur_file]
-                except (KeyError, FileNotFoundError):
-                    self.stop_callback()
-                    LOGGER.error('Sound sample not found: "{}"', self.cur_file)
-                    return  # Abort if music isn't found..
-
-                child_sys = self.system.get_system(file)
-                # Special case raw filesystems - Pyglet is more efficient
-                # if it can just open the file itself.
-                if isinstance(child_sys, RawFileSystem):
-                    load_path = os.path.join(child_sys.path, file.path)
-                    self._cur_sys = self._handle = None
-                    LOGGER.debug('Loading music directly from {!r}', load_path)
-                else:
-                    # Use the file objects directly.
-                    load_path = self.cur_file
-                    self._cur_sys = child_sys
-                    self._cur_sys.open_ref()
-                    self._handle = file.open_bin()
-                    LOGGER.debug('Loading music via {!r}', self._handle)
-                try:
-                    sound = pyglet.media.load(load_path, self._handle)
-                except (MediaDecodeException, MediaFormatException):
-                    self.stop_callback()
-                    LOGGER.exception('Sound sample not valid: "{}"', self.cur_file)
-                    return  # Abort if music isn't found..
+            try:
+                loader = self._find_sample(self.cur_file)
+            except (KeyError, FileNotFoundError) as exc:
+                # Report it the same way as errors in the background.
+                self._loading = Future()
+                self._loading.set_exception(exc)
+            else:
+                self._loading = _POOL.submit(loader)
+            self._check_loaded()
+
+        def _check_loaded(self) -> None:
+            """Start playing the sample once it has loaded."""
+            loading = self._loading
+            if loading is None:
+                return  # Cancelled.
+            if not loading.done():
+                self.after = TK_ROOT.after(SAMPLE_POLL, self._check_loaded)
+                return
+            self._loading = self.after = None
+
+            try:
+                sound = loading.result()
+            except (KeyError, FileNotFoundError):
+                self.stop_callback()
+                LOGGER.error('Sound sample not found: "{}"', self.cur_file)
+                return  # Abort if music isn't found..
+            except (MediaDecodeException, MediaFormatException):
+                self.stop_callback()
+                LOGGER.exception('Sound sample not valid: "{}"', self.cur_file)
+                return
 
             if self.start_time:
                 try:
@@ -242,13 +342,17 @@ else:
             self.start_callback()
 
         def stop(self) -> None:
-            """Cancel the music, if it's playing."""
-            if self.sample is None:
+            """Cancel the music, if it's playing or loading."""
+            if self._loading is not None:
+                # The result is just discarded.
+                self._loading.cancel()
+                self._loading = None
+            elif self.sample is not None:
+                self.sample.pause()
+                self.sample = None
+            else:
                 return
 
-            self.sample.pause()
-            self.sample = None
-            self._close_handles()
             self.stop_callback()
 
             if self.after is not None:
@@ -259,5 +363,4 @@ else:
             """Reset values after the sound has finished."""
             self.sample = None
             self.after = None
-            self._close_handles()
             self.stop_callback()
@@ -62,22 +62,70 @@ class MarkdownData:
 
     Blocks are a list of two-tuples - each is a Block type, and data for it.
     Links is a dict mapping urls to callback IDs.
+
+    Most descriptions are never displayed, so convert() and join() only
+    store their arguments. The actual work is done when blocks or links
+    are first accessed.
     """
     def __init__(
         self,
         blocks: Iterable[Tuple[BlockTags, Any]] = (),
         links: Dict[str, str] = None,
     ) -> None:
-        self.blocks = list(blocks)
-        self.links = links if links is not None else {}
+        self._blocks = list(blocks)
+        self._links = links if links is not None else {}
+        # If set, the text to convert or the data to join on first use.
+        self._source: Union[str, Tuple['MarkdownData', ...], None] = None
+
+    @classmethod
+    def _lazy(
+        cls,
+        source: Union[str, Tuple['MarkdownData', ...]],
+    ) -> 'MarkdownData':
+        """Create data which will be produced from this source when used."""
+        data = cls()
+        data._source = source
+        return data
+
+    def _resolve(self) -> None:
+        """Do the deferred conversion, if not done already."""
+        source = self._source
+        if source is None:
+            return
+        self._source = None
+        if isinstance(source, str):
+            result = _convert(source)
+        else:
+            result = _join(source)
+        self._blocks = result.blocks
+        self._links = result.links
+
+    @property
+    def blocks(self) -> List[Tuple[BlockTags, Any]]:
+        """The blocks of text or images."""
+        self._resolve()
+        return self._blocks
+
+    @property
+    def links(self) -> Dict[str, str]:
+        """URLs to link callback IDs."""
+        self._resolve()
+        return self._links
 
     def __bool__(self) -> bool:
         """Empty data is false."""
-        return bool(self.blocks)
+        source = self._source
+        if isinstance(source, str):
+            return bool(source.strip())
+        elif source is not None:
+            return any(source)
+        return bool(self._blocks)
 
     def copy(self) -> 'MarkdownData':
         """Create and return a duplicate of this object."""
-        return MarkdownData(self.blocks, self.links.copy())
+        if self._source is not None:
+            return MarkdownData._lazy(self._source)
+        return MarkdownData(self._blocks, self._links.copy())
 
     __copy__ = copy
 
@@ -280,7 +328,15 @@ _MD = markdown.Markdown(extensions=[
 
 
 def convert(text: str) -> MarkdownData:
-    """Convert markdown syntax into data ready to be passed to richTextBox."""
+    """Convert markdown syntax into data ready to be passed to richTextBox.
+
+    The conversion is done when the result is first used.
+    """
+    return MarkdownData._lazy(text)
+
+
+def _convert(text: str) -> MarkdownData:
+    """Actually run Markdown on the text."""
     _MD.reset()
     _MD.convert(text)
     return _converter.result
@@ -290,7 +346,13 @@ def join(*args: MarkdownData) -> MarkdownData:
     """Join several text blocks together.
 
     This merges together blocks, reassigning link callbacks as needed.
+    That is done when the result is first used.
     """
+    return MarkdownData._lazy(args)
+
+
+def _join(args: Iterable[MarkdownData]) -> MarkdownData:
+    """Actually join the text blocks together."""
     # If no tags are present, a block is empty entirely.
     # Skip processing empty blocks.
     to_join = list(filter(None, args))
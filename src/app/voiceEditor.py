@@ -231,6 +231,10 @@ def show(quote_pack):
     if voice_item is not None:
         return
 
+    if not UI:
+        # Only create the window when it's first used.
+        init_widgets()
+
     voice_item = quote_pack
 
     win.title(_('BEE2 - Configure "{}"').format(voice_item.selitem_data.name))
@@ -0,0 +1,197 @@
+"""Reads the output of Valve's compilers as it is produced.
+
+The VBSP and VRAD hooks run the compiler with run_compiler(), which logs
+Valve's output and passes it to a CompilerOutput handler. Each line is
+checked for stage changes and the brush/overlay/entity counts, and these
+are written to a small config file. The BEE2 app polls that to show the
+progress of the compile.
+"""
+import logging
+import re
+import subprocess
+import sys
+import time
+
+from BEE2_config import ConfigFile
+import srctools.logger
+import srctools.run
+
+from typing import Dict, List, Tuple
+
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+# The file in the config folder the progress is written to.
+PROGRESS_FILENAME = 'compile_progress.cfg'
+# Don't rewrite the file more often than this, unless the stage changes.
+WRITE_INTERVAL = 0.5
+
+# VBSP prints these near the end, like this:
+# nummapbrushes:    (?? / 8192)
+# The other values rarely hit the limits, so we don't track them.
+COUNT_NAMES = [
+    # VBSP values -> config names
+    ('nummapbrushes:', 'brush'),
+    ('num_map_overlays:', 'overlay'),
+    ('num_entities:', 'entity'),
+]
+
+# If VBSP fails, these are printed for the limit which was hit.
+LIMIT_ERRORS = [
+    'MAX_MAP_OVERLAYS',
+    'MAX_MAP_BRUSHSIDES',
+    'MAX_MAP_PLANES',
+    'MAX_MAP_ENTITIES',
+]
+
+# Each stage of the compilers prints a progress bar, like this:
+# BuildFacelights:  0...1...2...3...4...5...6...7...8...9...10 (0)
+# We use the label as the stage name.
+STAGE_RE = re.compile(r'^\s*([A-Za-z][^.:]*?)\s*[.:]*\s*0\.\.\.')
+
+
+class CompilerOutput(logging.Handler):
+    """Parses each line a compiler logs, and publishes its progress.
+
+    Attributes:
+        compiler: The name of the compiler being run.
+        stage: The label of the last progress bar printed.
+        counts: Config name -> (value, limit) for the counts found.
+        limit_error: The last line reporting a MAX_MAP_* limit, or ''.
+    """
+    def __init__(self, compiler: str) -> None:
+        super().__init__()
+        self.compiler = compiler
+        self.stage = ''
+        self.counts = {}  # type: Dict[str, Tuple[str, str]]
+        self.limit_error = ''
+        self.conf = ConfigFile(PROGRESS_FILENAME, auto_load=False)
+        self._last_write = 0.0
+        self.publish('running', force=True)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Parse each line of the record."""
+        try:
+            for line in record.getMessage().splitlines():
+                self.parse_line(line)
+        except Exception:
+            self.handleError(record)
+
+    def parse_partial(self, line: str) -> None:
+        """Check the start of a line which hasn't been finished yet.
+
+        Progress bars are printed as the stage runs, so this lets the stage
+        be shown while it's running instead of after it's done.
+        """
+        match = STAGE_RE.match(line)
+        if match is not None and match.group(1) != self.stage:
+            self.stage = match.group(1)
+            self.publish('running', force=True)
+
+    def parse_line(self, line: str) -> None:
+        """Check a single line of output."""
+        stripped = line.lstrip(' \t[|')
+        for prefix, name in COUNT_NAMES:
+            if stripped.startswith(prefix):
+                try:
+                    # Grab the two numbers from ( onwards.
+                    count_num, count_max = stripped.split('(', 1)[1].split('/')
+                except (IndexError, ValueError):
+                    LOGGER.warning('Unknown count line: "{}"', line)
+                    return
+                self.counts[name] = (
+                    count_num.strip(' \t\n'),
+                    # Strip the ending ) off the max. We have the value, so
+                    # we might as well tell the BEE2 if it changes..
+                    count_max.strip(') \t\n'),
+                )
+                self.publish('running')
+                return
+
+        for error in LIMIT_ERRORS:
+            if error in line:
+                self.limit_error = line
+                return
+
+        self.parse_partial(line)
+
+    def publish(self, state: str, force: bool=False) -> None:
+        """Write our current progress to the file.
+
+        Unless force is set this is skipped if it was written recently.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_write < WRITE_INTERVAL:
+            return
+        self._last_write = now
+
+        section = self.conf['Progress']
+        section['compiler'] = self.compiler
+        section['state'] = state
+        section['stage'] = self.stage
+        for name, (value, limit) in self.counts.items():
+            section[name] = value
+            section['max_' + name] = limit
+        try:
+            self.conf.save()
+        except OSError:
+            LOGGER.warning('Could not write compile progress!', exc_info=True)
+
+    def finish(self, code: int) -> None:
+        """Record that the compiler has exited."""
+        self.publish('done' if code == 0 else 'failed', force=True)
+
+
+def run_compiler(
+    name: str,
+    args: List[str],
+    logger: logging.Logger,
+    output: CompilerOutput,
+) -> int:
+    """Execute the original compiler, like srctools.run.run_compiler().
+
+    That only logs complete lines, but each stage's progress bar is only
+    finished when the stage is. So the output is read here instead, and
+    partial lines are also passed to output. It must already be a handler
+    for the logger, which receives the complete lines.
+    The process exit code is returned.
+    """
+    logger.info("Calling original {}...", name.upper())
+    logger.info('Args: {}', ', '.join(map(repr, args)))
+
+    # On Windows, calling this will pop open a console window. This suppresses
+    # that.
+    if sys.platform == 'win32':
+        startup_info = subprocess.STARTUPINFO()
+        startup_info.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startup_info.wShowWindow = subprocess.SW_HIDE
+    else:
+        startup_info = None
+
+    exe_name = srctools.run.get_compiler_name(name)
+    buf = bytearray()
+    with subprocess.Popen(
+        args=[exe_name] + args,
+        executable=exe_name,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        startupinfo=startup_info,
+    ) as proc:
+        while True:
+            # Returns whatever is available, as soon as there's anything.
+            data = proc.stdout.read1(4096)
+            if not data:
+                break
+            buf.extend(data)
+            *lines, partial = buf.split(b'\n')
+            for line in lines:
+                # Discard any invalid ASCII - we don't really care.
+                logger.info(line.decode('ascii', 'ignore').rstrip('\r'))
+            buf = partial
+            if buf:
+                output.parse_partial(buf.decode('ascii', 'ignore'))
+        if buf:
+            logger.info(buf.decode('ascii', 'ignore').rstrip('\r'))
+
+    logger.info("{} Done!", name.upper())
+    return proc.returncode
@@ -11,13 +11,15 @@ from weakref import WeakSet
 from abc import abstractmethod
 import contextlib
 import multiprocessing
+import threading
+import time
 
 from loadScreen_daemon import run_screen as _splash_daemon
 from BEE2_config import GEN_OPTS
 import utils
 import srctools.logger
 
-from typing import Set, Tuple, cast, Any, Type
+from typing import Set, Tuple, Dict, Optional, cast, Any, Type
 
 
 # Keep a reference to all loading screens, so we can close them globally.
@@ -32,6 +34,14 @@ _SCREEN_CANCEL_FLAG: Set[int] = set()
 _PIPE_MAIN_REC, _PIPE_DAEMON_SEND = multiprocessing.Pipe(duplex=False)
 _PIPE_DAEMON_REC, _PIPE_MAIN_SEND = multiprocessing.Pipe(duplex=False)
 
+# Steps are accumulated, and only sent to the daemon at most this often (in
+# seconds). Other operations, or a stage completing, send them immediately.
+# Otherwise they're sent by a timer, in case the next step takes a while.
+STEP_INTERVAL = 1 / 20
+# Held while sending to the daemon, or changing the pending steps, since
+# the timer sends from another thread.
+_SEND_LOCK = threading.Lock()
+
 
 class Cancelled(SystemExit):
     """Raised when the user cancels the loadscreen."""
@@ -47,7 +57,8 @@ def close_all() -> None:
 
 def show_main_loader(is_compact: bool) -> None:
     """Special function, which sets the splash screen compactness."""
-    _PIPE_MAIN_SEND.send(('set_is_compact', id(main_loader), (is_compact, )))
+    with _SEND_LOCK:
+        _PIPE_MAIN_SEND.send(('set_is_compact', id(main_loader), (is_compact, )))
     main_loader.show()
 
 
@@ -101,6 +112,17 @@ class LoadScreen:
 
         _ALL_SCREENS.add(self)
 
+        # Steps we haven't sent to the daemon yet.
+        self._pending_steps: Dict[str, int] = {}
+        # Local copies of the progress, so we know when a stage finishes.
+        # The lengths are kept after resetting, since screens are usually
+        # reused for the same thing.
+        self._values: Dict[str, int] = {}
+        self._maxes: Dict[str, int] = {}
+        self._last_flush = 0.0
+        # If set, this will send the pending steps shortly.
+        self._flush_timer: Optional[threading.Timer] = None
+
         # Order the daemon to make this screen.
         self._send_msg('init', is_splash, title_text, stages)
 
@@ -125,8 +147,26 @@ class LoadScreen:
 
     def _send_msg(self, command: str, *args: Any) -> None:
         """Send a message to the daemon."""
-        _PIPE_MAIN_SEND.send((command, id(self), args))
-        # Check the messages coming back as well.
+        with _SEND_LOCK:
+            # Make sure steps stay ordered relative to other commands.
+            if self._pending_steps:
+                self._flush_steps()
+            _PIPE_MAIN_SEND.send((command, id(self), args))
+        self._check_replies()
+
+    def _flush_steps(self) -> None:
+        """Send all the accumulated steps to the daemon.
+
+        _SEND_LOCK must be held.
+        """
+        self._last_flush = time.monotonic()
+        pending = self._pending_steps
+        self._pending_steps = {}
+        for stage, count in pending.items():
+            _PIPE_MAIN_SEND.send(('step', id(self), (stage, count)))
+
+    def _check_replies(self) -> None:
+        """Check the messages coming back from the daemon."""
         while _PIPE_MAIN_REC.poll():
             arg: Any
             command, arg = _PIPE_MAIN_REC.recv()
@@ -144,19 +184,50 @@ class LoadScreen:
         # will then stop.
         if id(self) in _SCREEN_CANCEL_FLAG:
             _SCREEN_CANCEL_FLAG.discard(id(self))
+            with _SEND_LOCK:
+                self._pending_steps.clear()
             LOGGER.info('User cancelled loading screen.')
             raise Cancelled
 
     def set_length(self, stage: str, num: int) -> None:
         """Set the maximum value for the specified stage."""
+        self._maxes[stage] = num
         self._send_msg('set_length', stage, num)
 
     def step(self, stage: str) -> None:
-        """Increment the specified stage."""
-        self._send_msg('step', stage)
+        """Increment the specified stage.
+
+        This is accumulated, and only sent to the daemon periodically.
+        """
+        with _SEND_LOCK:
+            self._pending_steps[stage] = self._pending_steps.get(stage, 0) + 1
+            self._values[stage] = value = self._values.get(stage, 0) + 1
+            if (
+                value >= self._maxes.get(stage, 10)
+                or time.monotonic() - self._last_flush >= STEP_INTERVAL
+            ):
+                self._flush_steps()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(
+                    STEP_INTERVAL,
+                    self._timed_flush,
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        self._check_replies()
+
+    def _timed_flush(self) -> None:
+        """Run by the timer, to send steps if nothing else has."""
+        with _SEND_LOCK:
+            self._flush_timer = None
+            if self._pending_steps:
+                self._flush_steps()
 
     def skip_stage(self, stage: str) -> None:
         """Skip over this stage of the loading process."""
+        with _SEND_LOCK:
+            self._pending_steps.pop(stage, None)
+        self._values[stage] = self._maxes[stage] = 0
         self._send_msg('skip_stage', stage)
 
     def show(self) -> None:
@@ -167,11 +238,16 @@ class LoadScreen:
     def reset(self) -> None:
         """Hide the loading screen and reset all the progress bars."""
         self.active = False
+        with _SEND_LOCK:
+            self._pending_steps.clear()
+        self._values.clear()
         self._send_msg('reset')
 
     def destroy(self):
         """Permanently destroy this screen and cleanup."""
         self.active = False
+        with _SEND_LOCK:
+            self._pending_steps.clear()
         self._send_msg('destroy')
         _ALL_SCREENS.remove(self)
 
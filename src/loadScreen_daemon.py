@@ -121,9 +121,12 @@ class BaseLoadScreen:
             self.values[stage] = 0
         self.reset_stages()
 
-    def op_step(self, stage: str) -> None:
-        """Increment the specified value."""
-        self.values[stage] += 1
+    def op_step(self, stage: str, count: int=1) -> None:
+        """Increment the specified value.
+
+        The main process accumulates steps, so this may be several at once.
+        """
+        self.values[stage] += count
         self.update_stage(stage)
 
     def op_set_length(self, stage: str, num: int) -> None:
@@ -586,9 +589,25 @@ def run_screen(
         """Update stages from the parent process."""
         nonlocal force_ontop
         had_values = False
+        # Steps are combined, so each bar is only redrawn once.
+        # (scr_id, stage) -> count
+        steps: Dict[Tuple[int, str], int] = {}
+
+        def apply_steps() -> None:
+            """Apply the accumulated steps."""
+            for (step_id, stage), count in steps.items():
+                SCREENS[step_id].op_step(stage, count)
+            steps.clear()
+
         while PIPE_REC.poll():  # Pop off all the values.
             had_values = True
             operation, scr_id, args = PIPE_REC.recv()
+            if operation == 'step':
+                stage, count = args
+                steps[scr_id, stage] = steps.get((scr_id, stage), 0) + count
+                continue
+            # Other operations need to happen after the steps.
+            apply_steps()
             if operation == 'init':
                 # Create a new loadscreen.
                 is_main, title, stages = args
@@ -607,6 +626,8 @@ def run_screen(
                     func(*args)
                 except Exception:
                     raise Exception(operation)
+        # And any left at the end.
+        apply_steps()
 
         # Continually re-run this function in the TK loop.
         # If we didn't find anything in the pipe, wait longer.
@@ -6,7 +6,10 @@ import os
 import shutil
 import math
 import re
+from zlib import crc32
 from collections import defaultdict
+from contextlib import ExitStack
+from functools import partial
 
 import srctools
 from app import tkMarkdown
@@ -25,7 +28,7 @@ import srctools.logger
 from typing import (
     Union, Optional, Any, TYPE_CHECKING,
     Callable, TypeVar, Type, cast,
-    Dict, List, Tuple, Set, Match,
+    Dict, List, Tuple, Set, Match, Pattern,
     NamedTuple, Collection,
     Iterable, Iterator,
     FrozenSet,
@@ -121,6 +124,8 @@ CORRIDOR_COUNTS = {
 
 # Finds names surrounded by %s
 RE_PERCENT_VAR = re.compile(r'%(\w*)%')
+# Backreferences or named groups, which prevent joining regexes together.
+RE_BACKREF = re.compile(r'\\[1-9]|\(\?P[<=]')
 
 # This package contains necessary components, and must be available.
 CLEAN_PACKAGE = 'BEE2_CLEAN_STYLE'
@@ -128,6 +133,9 @@ CLEAN_PACKAGE = 'BEE2_CLEAN_STYLE'
 # Check to see if the zip contains the resources referred to by the packfile.
 CHECK_PACKFILE_CORRECTNESS = False
 
+# Files for the style VPK are read in chunks this size to check their CRC.
+VPK_READ_CHUNK = 64 * 1024
+
 VPK_OVERRIDE_README = """\
 Files in this folder will be written to the VPK during every BEE2 export.
 Use to override resources as you please.
@@ -923,12 +931,93 @@ def apply_replacements(conf: Property) -> Property:
         except KeyError:
             raise ValueError('Unresolved variable: {!r}\n{}'.format(var, replace))
 
-    for prop in new_conf.iter_tree(blocks=True):
-        prop.name = RE_PERCENT_VAR.sub(rep_func, prop.real_name)
-        if not prop.has_children():
-            prop.value = RE_PERCENT_VAR.sub(rep_func, prop.value)
+    def replace_vars(text: str) -> str:
+        """Replace the variables in a name or value."""
+        # Most names and values have no variables at all, so check for a
+        # percent first - that's much quicker than running the regex.
+        if '%' in text:
+            return RE_PERCENT_VAR.sub(rep_func, text)
+        return text
+
+    # The config is shared with the item, so don't modify it in place.
+    return map_tree(new_conf, replace_vars, blocks=True)
+
+
+def map_tree(
+    tree: Property,
+    func: Callable[[str], str],
+    blocks: bool=False,
+) -> Property:
+    """Apply a function to the names and values in a tree, without modifying it.
+
+    Any block which has changes is copied, but unchanged properties and
+    blocks are shared with the original tree. If nothing changes, the
+    original is returned. If blocks is True, block names are changed too.
+    """
+    changed = False
+    children = []
+    for prop in tree:
+        if prop.has_children():
+            new_prop = map_tree(prop, func, blocks)
+            if blocks:
+                name = func(prop.real_name)
+                if name != prop.real_name:
+                    new_prop = Property(name, new_prop.value)
+        else:
+            name = func(prop.real_name)
+            value = func(prop.value)
+            if name != prop.real_name or value != prop.value:
+                new_prop = Property(name, value)
+            else:
+                new_prop = prop
+        if new_prop is not prop:
+            changed = True
+        children.append(new_prop)
+
+    if changed:
+        return Property(tree.real_name, children)
+    else:
+        return tree
+
+
+def copy_editor_item(item: Property) -> Property:
+    """Copy the parts of an editoritems Item block ItemVariant.modify() alters.
+
+    That's the subtypes and the instance and IO definitions, the other
+    blocks are shared with the original.
+    """
+    new_item = Property(item.real_name, [])
+    for prop in item:
+        if prop.name == 'editor':
+            prop = Property(prop.real_name, [
+                sub.copy() if sub.name == 'subtype' else sub
+                for sub in prop
+            ])
+        elif prop.name == 'exporting':
+            prop = Property(prop.real_name, [
+                sub.copy() if sub.name in ('instances', 'inputs', 'outputs') else sub
+                for sub in prop
+            ])
+        new_item.append(prop)
+    return new_item
 
-    return new_conf
+
+def combine_regexes(patterns: List[str]) -> Optional[Pattern]:
+    """Combine several regexes into one, matching any of them.
+
+    This can be used to quickly check if any of them match. None is returned
+    if that can't be done safely, because of backreferences or named groups.
+    """
+    for pattern in patterns:
+        if RE_BACKREF.search(pattern):
+            return None
+    try:
+        return re.compile(
+            '|'.join('(?:{})'.format(pattern) for pattern in patterns),
+            re.IGNORECASE,
+        )
+    except re.error:
+        return None
 
 
 class ItemVariant:
@@ -966,11 +1055,15 @@ class ItemVariant:
         self.all_icon = all_icon
 
     def copy(self) -> 'ItemVariant':
-        """Make a copy of all the data."""
+        """Make a copy of all the data.
+
+        The property trees are shared, since they're not modified after
+        the variant is set up - modify() and the export copy what they change.
+        """
         return ItemVariant(
-            self.editor.copy(),
-            self.vbsp_config.copy(),
-            self.editor_extra.copy(),
+            self.editor,
+            self.vbsp_config,
+            self.editor_extra,
             self.authors.copy(),
             self.tags.copy(),
             self.desc.copy(),
@@ -1011,19 +1104,37 @@ class ItemVariant:
                 pak_id=fsys.path,
             )
         else:
-            vbsp_config = self.vbsp_config.copy()
+            # Only the top level needs copying for the append below, the
+            # rest is shared with our config.
+            vbsp_config = Property(
+                self.vbsp_config.real_name,
+                list(self.vbsp_config),
+            )
 
         if 'replace' in props:
             # Replace property values in the config via regex.
+            replace_props = list(props.find_children('Replace'))
             replace_vals = [
                 (re.compile(prop.real_name, re.IGNORECASE), prop.value)
-                for prop in
-                props.find_children('Replace')
+                for prop in replace_props
             ]
-            for prop in vbsp_config.iter_tree():
+            # Each regex applies to the result of the previous one, so
+            # they have to be run in order. But if none match the original
+            # text, none can match at all - check that with one search.
+            any_match = combine_regexes([
+                prop.real_name for prop in replace_props
+            ])
+
+            def replace_text(text: str) -> str:
+                """Apply all the replacements to a name or value."""
+                if any_match is not None and not any_match.search(text):
+                    return text
                 for regex, sub in replace_vals:
-                    prop.name = regex.sub(sub, prop.real_name)
-                    prop.value = regex.sub(sub, prop.value)
+                    text = regex.sub(sub, text)
+                return text
+
+            # This copies only the blocks with replaced values.
+            vbsp_config = map_tree(vbsp_config, replace_text)
 
         vbsp_config += list(get_config(
             props,
@@ -1055,9 +1166,12 @@ class ItemVariant:
             tags = self.tags.copy()
 
         variant = ItemVariant(
-            self.editor.copy(),
+            copy_editor_item(self.editor),
             vbsp_config,
-            self.editor_extra.copy(),
+            Property(self.editor_extra.real_name, [
+                copy_editor_item(item) if item.name == 'item' else item
+                for item in self.editor_extra
+            ]),
             authors=authors,
             tags=tags,
             desc=desc,
@@ -2891,10 +3005,7 @@ class StyleVPK(PakObject, has_img=False):
         else:
             sel_vpk = None
 
-        try:
-            dest_folder = StyleVPK.clear_vpk_files(exp_data.game)
-        except PermissionError:
-            raise NoVPKExport()  # We can't edit the VPK files - P2 is open..
+        dest_folder = StyleVPK.vpk_folder(exp_data.game)
 
         if exp_data.game.steamID == utils.STEAM_IDS['PORTAL2']:
             # In Portal 2, we make a dlc3 folder - this changes priorities,
@@ -2917,30 +3028,153 @@ class StyleVPK(PakObject, has_img=False):
                     # It's fine, this will be regenerated automatically
                     pass
 
-        # Generate the VPK.
-        vpk_file = VPK(os.path.join(dest_folder, 'pak01_dir.vpk'), mode='w')
-        with vpk_file:
+        # Additionally, pack in game/vpk_override/ into the vpk - this allows
+        # users to easily override resources in general.
+        override_folder = exp_data.game.abs_path('vpk_override')
+        os.makedirs(override_folder, exist_ok=True)
+
+        # Also write a file to explain what it's for..
+        with open(os.path.join(override_folder, 'BEE2_README.txt'), 'w') as f:
+            f.write(VPK_OVERRIDE_README)
+
+        # VPK path -> (size, CRC, function to read the data). Only the
+        # changed files are read again when writing.
+        files: Dict[str, Tuple[int, int, Callable[[], bytes]]] = {}
+        with ExitStack() as stack:
             if sel_vpk is not None:
+                stack.enter_context(sel_vpk.fsys)
                 for file in sel_vpk.fsys.walk_folder(sel_vpk.dir):
                     with file.open_bin() as open_file:
-                        vpk_file.add_file(
-                            file.path,
-                            open_file.read(),
-                            sel_vpk.dir,
-                        )
+                        size, crc = _size_crc(open_file)
+                    files[_vpk_path(os.path.relpath(
+                        file.path, sel_vpk.dir,
+                    ))] = size, crc, partial(_read_sys_file, file)
+
+            for folder, _, filenames in os.walk(override_folder):
+                for filename in filenames:
+                    full_path = os.path.join(folder, filename)
+                    path = _vpk_path(os.path.relpath(full_path, override_folder))
+                    if path == 'BEE2_README.txt':
+                        continue  # Don't add this to the VPK though..
+                    with open(full_path, 'rb') as f:
+                        size, crc = _size_crc(f)
+                    files[path] = size, crc, partial(_read_os_file, full_path)
+
+            try:
+                StyleVPK.write_vpk(
+                    os.path.join(dest_folder, 'pak01_dir.vpk'),
+                    files,
+                )
+            except PermissionError:
+                LOGGER.warning("Couldn't replace VPK files. Is Portal 2 "
+                               "or Hammer open?")
+                raise NoVPKExport()
+
+    @staticmethod
+    def write_vpk(
+        dir_path: str,
+        files: Dict[str, Tuple[int, int, Callable[[], bytes]]],
+    ) -> None:
+        """Update the VPK at this location to contain exactly these files.
+
+        files maps each path to its size, CRC and a function returning
+        the data. The existing VPK is compared by size and CRC. If it already
+        matches, nothing is written. Otherwise only changed files are
+        appended and the directory is rewritten, unless the archive would then
+        contain more stale data than live data.
+        """
+        try:
+            old_vpk = VPK(dir_path, mode='r')
+            # Normalised path -> FileInfo
+            existing = {
+                _vpk_path(info.name): info
+                for info in old_vpk
+            }
+        except FileNotFoundError:
+            LOGGER.info('No existing VPK, building.')
+            StyleVPK._rebuild_vpk(dir_path, files)
+            return
+        except Exception:
+            # srctools raises plain Exception for some truncated files,
+            # for example if a previous export was interrupted.
+            LOGGER.warning('Existing VPK is invalid, rebuilding.', exc_info=True)
+            StyleVPK._rebuild_vpk(dir_path, files)
+            return
+
+        # If the archive is missing or cut short, every file which is
+        # supposed to be in it needs to be written again.
+        folder = os.path.dirname(dir_path)
+        arch_sizes = {}  # type: Dict[int, int]
+        for info in existing.values():
+            if not info.arch_len or info.arch_index is None:
+                continue
+            try:
+                arch_size = arch_sizes[info.arch_index]
+            except KeyError:
+                try:
+                    arch_size = os.path.getsize(os.path.join(
+                        folder, 'pak01_{:03}.vpk'.format(info.arch_index),
+                    ))
+                except FileNotFoundError:
+                    arch_size = -1
+                arch_sizes[info.arch_index] = arch_size
+            if info.offset + info.arch_len > arch_size:
+                LOGGER.warning('VPK archive is missing data, rebuilding.')
+                StyleVPK._rebuild_vpk(dir_path, files)
+                return
 
-            # Additionally, pack in game/vpk_override/ into the vpk - this allows
-            # users to easily override resources in general.
+        changed = [
+            path for path, (size, crc, _) in files.items()
+            if path not in existing
+            or existing[path].crc != crc
+            or len(existing[path].start_data) + existing[path].arch_len != size
+        ]
+        removed = existing.keys() - files.keys()
 
-            override_folder = exp_data.game.abs_path('vpk_override')
-            os.makedirs(override_folder, exist_ok=True)
+        if not changed and not removed:
+            LOGGER.info('VPK unchanged, {} files.', len(files))
+            return
 
-            # Also write a file to explain what it's for..
-            with open(os.path.join(override_folder, 'BEE2_README.txt'), 'w') as f:
-                f.write(VPK_OVERRIDE_README)
+        # Appending leaves the old data in the archive. If that's now most
+        # of the file, just rebuild from scratch.
+        changed_set = set(changed)
+        changed_size = sum(files[path][0] for path in changed)
+        live_size = sum(
+            info.arch_len for path, info in existing.items()
+            if path not in changed_set and path not in removed
+            and info.arch_index == 0
+        ) + changed_size
+        if max(arch_sizes.get(0, 0), 0) + changed_size > 2 * live_size:
+            StyleVPK._rebuild_vpk(dir_path, files)
+            return
 
-            vpk_file.add_folder(override_folder)
-            del vpk_file['BEE2_README.txt']  # Don't add this to the VPK though..
+        with VPK(dir_path, mode='a') as vpk_file:
+            for path in removed:
+                del vpk_file[existing[path].name]
+            for path in changed:
+                if path in existing:
+                    del vpk_file[existing[path].name]
+                vpk_file.add_file(path, files[path][2]())
+        LOGGER.info(
+            'Updated VPK: {} changed, {} removed, {} total files.',
+            len(changed), len(removed), len(files),
+        )
+
+    @staticmethod
+    def _rebuild_vpk(
+        dir_path: str,
+        files: Dict[str, Tuple[int, int, Callable[[], bytes]]],
+    ) -> None:
+        """Write a brand new VPK with these files."""
+        folder = os.path.dirname(dir_path)
+        for file in os.listdir(folder):
+            if file[:6] == 'pak01_':
+                os.remove(os.path.join(folder, file))
+
+        vpk_file = VPK(dir_path, mode='w')
+        with vpk_file:
+            for path, (_, _, read) in files.items():
+                vpk_file.add_file(path, read())
 
         LOGGER.info('Written {} files to VPK!', len(vpk_file))
 
@@ -2955,6 +3189,16 @@ class StyleVPK(PakObject, has_img=False):
         for i in range(999):
             yield '_{:03}.vpk'.format(i)
 
+    @staticmethod
+    def vpk_folder(game) -> str:
+        """Return the folder the VPK is placed in, creating it if required."""
+        dest_folder = game.abs_path(VPK_FOLDER.get(
+            game.steamID,
+            'portal2_dlc3',
+        ))
+        os.makedirs(dest_folder, exist_ok=True)
+        return dest_folder
+
     @staticmethod
     def clear_vpk_files(game) -> str:
         """Remove existing VPKs files from a game.
@@ -2964,12 +3208,7 @@ class StyleVPK(PakObject, has_img=False):
 
         This returns the path to the game folder.
         """
-        dest_folder = game.abs_path(VPK_FOLDER.get(
-            game.steamID,
-            'portal2_dlc3',
-        ))
-
-        os.makedirs(dest_folder, exist_ok=True)
+        dest_folder = StyleVPK.vpk_folder(game)
         try:
             for file in os.listdir(dest_folder):
                 if file[:6] == 'pak01_':
@@ -2983,6 +3222,37 @@ class StyleVPK(PakObject, has_img=False):
         return dest_folder
 
 
+def _vpk_path(path: str) -> str:
+    """Normalise a path the way it's stored in a VPK."""
+    path = path.replace('\\', '/')
+    while path[:2] == './':
+        path = path[2:]
+    return path
+
+
+def _size_crc(file) -> Tuple[int, int]:
+    """Compute the size and CRC of an open file, reading it in chunks."""
+    size = crc = 0
+    while True:
+        chunk = file.read(VPK_READ_CHUNK)
+        if not chunk:
+            return size, crc
+        size += len(chunk)
+        crc = crc32(chunk, crc)
+
+
+def _read_sys_file(file) -> bytes:
+    """Read the data for a file in a package's filesystem."""
+    with file.open_bin() as f:
+        return f.read()
+
+
+def _read_os_file(path: str) -> bytes:
+    """Read the data for a file on disk."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
 class Elevator(PakObject):
     """An elevator video definition.
 
@@ -7,6 +7,11 @@ they will be copied to any packages with those resources.
 
 The destination will be 'Portal 2/bee2_dev/' if that exists, or 'Portal 2/bee2/'
 otherwise.
+
+Alternatively, pass --watch to keep checking the unzipped packages and Portal 2
+for changes, copying changed files over as they happen. Specific folders can be
+passed after --watch, otherwise all package resources and Portal 2's folders
+are watched.
 """
 
 import utils
@@ -24,9 +29,11 @@ gettext.NullTranslations().install(['gettext', 'ngettext'])
 
 import os
 import sys
+import time
 import logging
 from pathlib import Path
-from typing import List, Optional
+from zlib import crc32
+from typing import List, Optional, Dict, Tuple, NamedTuple
 
 import shutil
 
@@ -44,6 +51,12 @@ SKIPPED_FILES: List[str] = []
 # If enabled, ignore anything not in packages and that needs prompting.
 NO_PROMPT = False
 
+# These files are produced when compiling, and shouldn't be copied.
+IGNORED_EXT = ('.vmx', '.log', '.bsp', '.prt', '.lin')
+
+# In watch mode, the seconds between each check for changes.
+WATCH_INTERVAL = 1.0
+
 
 def get_package(file: Path) -> RawFileSystem:
     """Get the package desired for a file."""
@@ -85,8 +98,11 @@ def get_package(file: Path) -> RawFileSystem:
             return fsys
 
 
-def check_file(file: Path, portal2: Path, packages: Path) -> None:
-    """Check for the location this file is in, and copy it to the other place."""
+def check_file(file: Path, portal2: Path, packages: Path) -> List[Path]:
+    """Check for the location this file is in, and copy it to the other place.
+
+    The locations copied to are returned.
+    """
     try:
         relative = file.relative_to(portal2)
     except ValueError:
@@ -97,13 +113,13 @@ def check_file(file: Path, portal2: Path, packages: Path) -> None:
         except ValueError:
             # Not in either.
             LOGGER.warning('File "{!s}" not in packages or Portal 2!', file)
-            return
+            return []
         part = relative.parts
         try:
             res_path = Path(*part[part.index('resources')+1:])
         except IndexError:
             LOGGER.warning('File "{!s} not a resource!', file)
-            return
+            return []
 
         if res_path.parts[0] == 'instances':
             dest = (
@@ -113,7 +129,7 @@ def check_file(file: Path, portal2: Path, packages: Path) -> None:
             )
         elif res_path.parts[0] == 'bee2':
             LOGGER.warning('File "{!s}" not for copying!', file)
-            return
+            return []
         else:
             if (portal2 / 'bee2_dev').exists():
                 dest = portal2 / 'bee2_dev' / res_path
@@ -122,6 +138,7 @@ def check_file(file: Path, portal2: Path, packages: Path) -> None:
         LOGGER.info('"{}" -> "{}"', file, dest)
         os.makedirs(str(dest.parent), exist_ok=True)
         shutil.copy(str(file), str(dest))
+        return [dest]
     else:
         # In Portal 2, copy to each matching package.
         try:
@@ -144,19 +161,146 @@ def check_file(file: Path, portal2: Path, packages: Path) -> None:
 
         if not target_systems:
             if NO_PROMPT:
-                EXTRA_FILES.append(rel_loc)
-                return
+                SKIPPED_FILES.append(str(rel_loc))
+                return []
             # This file is totally new.
             try:
                 target_systems.append(get_package(rel_loc))
             except KeyboardInterrupt:
-                return
+                return []
 
+        copied = []
         for fsys in target_systems:
-            full_loc = fsys.path / rel_loc
+            full_loc = Path(fsys.path, rel_loc)
             LOGGER.info('"{}" -> "{}"', file, full_loc)
             os.makedirs(str(full_loc.parent), exist_ok=True)
             shutil.copy(str(file), str(full_loc))
+            copied.append(full_loc)
+        return copied
+
+
+class FileState(NamedTuple):
+    """The last known state of a watched file."""
+    size: int
+    mtime: int
+    hash: int
+
+
+def hash_file(file: Path) -> int:
+    """Compute the checksum of a file's contents."""
+    checksum = 0
+    with file.open('rb') as f:
+        for block in iter(lambda: f.read(64 * 1024), b''):
+            checksum = crc32(block, checksum)
+    return checksum
+
+
+class Watcher:
+    """Finds the files which changed in a set of folders.
+
+    Only files with a different size or modification time are read, and
+    those are compared by hash - so files which were just touched, or which
+    we copied, aren't counted. Folders are only listed again if their
+    modification time changes, which happens when files are added or removed.
+    """
+    def __init__(self, folders: List[Path]) -> None:
+        self.folders = folders
+        self.files: Dict[Path, FileState] = {}
+        # Folder -> (mtime, files, subfolders)
+        self._listings: Dict[Path, Tuple[int, List[Path], List[Path]]] = {}
+
+    def _list_folder(self, folder: Path, found: List[Path]) -> None:
+        """Add all the files in this folder, and its subfolders."""
+        try:
+            mtime = folder.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._listings.pop(folder, None)
+            return
+        try:
+            last_mtime, files, subfolders = self._listings[folder]
+        except KeyError:
+            last_mtime = files = subfolders = None
+        if last_mtime != mtime:
+            files = []
+            subfolders = []
+            with os.scandir(str(folder)) as scan:
+                for entry in scan:
+                    if entry.is_dir():
+                        subfolders.append(Path(entry.path))
+                    elif entry.is_file():
+                        files.append(Path(entry.path))
+            self._listings[folder] = (mtime, files, subfolders)
+        found.extend(files)
+        for subfolder in subfolders:
+            self._list_folder(subfolder, found)
+
+    def update(self, file: Path) -> bool:
+        """Record the current state of a file, and return if it changed."""
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            return False
+        old = self.files.get(file)
+        if old is not None and old.size == stat.st_size and old.mtime == stat.st_mtime_ns:
+            return False
+        try:
+            file_hash = hash_file(file)
+        except OSError:
+            # Probably still being written, try again next time.
+            return False
+        self.files[file] = FileState(stat.st_size, stat.st_mtime_ns, file_hash)
+        return old is None or old.hash != file_hash
+
+    def check(self) -> List[Path]:
+        """Return the files which were changed or added since the last check."""
+        found: List[Path] = []
+        for folder in self.folders:
+            self._list_folder(folder, found)
+
+        changed = [file for file in found if self.update(file)]
+
+        if len(found) != len(self.files):
+            # Forget removed files.
+            for file in self.files.keys() - set(found):
+                del self.files[file]
+        return changed
+
+
+def watch(folders: List[Path], portal2: Path, packages: Path) -> None:
+    """Copy files over whenever they change, until interrupted."""
+    watcher = Watcher(folders)
+    # Find the current state of everything, and don't copy that.
+    watcher.check()
+    LOGGER.info(
+        'Watching {} files in {} folders, press Ctrl-C to stop.',
+        len(watcher.files), len(folders),
+    )
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            changed = [
+                file for file in watcher.check()
+                if file.suffix.casefold() not in IGNORED_EXT
+            ]
+            if not changed:
+                continue
+            copy_count = 0
+            for file in changed:
+                for dest in check_file(file, portal2, packages):
+                    # Don't copy it back next time.
+                    watcher.update(dest)
+                    copy_count += 1
+            LOGGER.info(
+                '{} files changed, made {} copies.',
+                len(changed), copy_count,
+            )
+            if SKIPPED_FILES:
+                LOGGER.warning('Skipped files not in any package:')
+                for file in SKIPPED_FILES:
+                    LOGGER.info('- {}', file)
+                SKIPPED_FILES.clear()
+    except KeyboardInterrupt:
+        LOGGER.info('Stopped watching.')
 
 
 def print_package_ids() -> None:
@@ -172,7 +316,13 @@ def print_package_ids() -> None:
 
 def main(files: List[str]) -> int:
     """Run the transfer."""
-    if not files:
+    global NO_PROMPT
+    watch_mode = bool(files) and files[0] == '--watch'
+    if watch_mode:
+        files = files[1:]
+        # We can't wait for input while watching.
+        NO_PROMPT = True
+    elif not files:
         LOGGER.error('No files to copy!')
         LOGGER.error('packages_sync: {}', __doc__)
         return 1
@@ -202,6 +352,23 @@ def main(files: List[str]) -> int:
 
     package_loc = Path('../', GEN_OPTS['Directories']['package']).resolve()
 
+    if watch_mode:
+        if files:
+            folders = [Path(file).resolve() for file in files]
+        else:
+            folders = [
+                Path(pack.fsys.path, 'resources').resolve()
+                for pack in PACKAGES.values()
+                if isinstance(pack.fsys, RawFileSystem)
+            ]
+            folders.append(portal2_loc / 'sdk_content/maps/instances/bee2')
+            if (portal2_loc / 'bee2_dev').exists():
+                folders.append(portal2_loc / 'bee2_dev')
+            else:
+                folders.append(portal2_loc / 'bee2')
+        watch(folders, portal2_loc, package_loc)
+        return 0
+
     file_list = []  # type: List[Path]
 
     for file in files:
@@ -216,7 +383,7 @@ def main(files: List[str]) -> int:
     files_to_check = set()
 
     for file_path in file_list:
-        if file_path.suffix.casefold() in ('.vmx', '.log', '.bsp', '.prt', '.lin'):
+        if file_path.suffix.casefold() in IGNORED_EXT:
             # Ignore these file types.
             continue
         files_to_check.add(file_path)
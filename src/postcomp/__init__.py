@@ -0,0 +1,69 @@
+"""Transformations applied to the compiled BSP by the VRAD hook.
+
+srctools.bsp_transform.run_transformations() runs every transform one at a
+time, sorted by priority. Transforms with the same priority, which includes
+all of BEE2's, run in the order they were registered, which depends on import
+order. So BEE2's transforms must give the same result whichever order they
+run in.
+
+To make that checkable, BEE2's transforms are registered with transform(),
+which records what parts of the map each reads and writes:
+
+* 'classname:<name>' - entities with that classname, including removing them.
+* 'targetname:<name>' - entities with that name, and VScript code added
+  to them.
+* 'pack' - the pack list. Packing only adds files, so transforms which
+  just write to this don't interfere with each other.
+
+find_conflicts() then lists transforms which depend on each other.
+"""
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Tuple
+
+from srctools.bsp_transform import Context, trans
+
+
+class Access(NamedTuple):
+    """The parts of the map a transform reads and writes."""
+    reads: FrozenSet[str]
+    writes: FrozenSet[str]
+
+
+# Resources which are only added to, so multiple writers are fine.
+APPEND_ONLY = frozenset({'pack'})
+
+# Transform name -> what it accesses.
+TRANSFORMS: Dict[str, Access] = {}
+
+
+def transform(
+    name: str,
+    *,
+    reads: Iterable[str]=(),
+    writes: Iterable[str]=(),
+) -> Callable[[Callable[[Context], None]], Callable[[Context], None]]:
+    """Register a transform with srctools, declaring what it accesses."""
+    access = Access(frozenset(reads), frozenset(writes))
+
+    def deco(func: Callable[[Context], None]) -> Callable[[Context], None]:
+        TRANSFORMS[name] = access
+        return trans(name)(func)
+    return deco
+
+
+def find_conflicts() -> List[Tuple[str, str, FrozenSet[str]]]:
+    """Find pairs of transforms where one writes what the other uses.
+
+    Each is returned with the resources involved. If there are any, the
+    result depends on which runs first.
+    """
+    conflicts = []
+    items = sorted(TRANSFORMS.items())
+    for i, (name_a, access_a) in enumerate(items):
+        for name_b, access_b in items[i + 1:]:
+            shared = (
+                access_a.writes & (access_b.reads | access_b.writes)
+                | access_b.writes & access_a.reads
+            ) - APPEND_ONLY
+            if shared:
+                conflicts.append((name_a, name_b, shared))
+    return conflicts
@@ -1,13 +1,18 @@
 from typing import Dict, List, Optional
 
 from srctools import Entity
-from srctools.bsp_transform import Context, trans
+from srctools.bsp_transform import Context
 import srctools.logger
+from postcomp import transform
 
 LOGGER = srctools.logger.get_logger(__name__)
 
 
-@trans('BEE2: Coop Responses')
+@transform(
+    'BEE2: Coop Responses',
+    reads=['classname:bee2_coop_response', 'targetname:@glados'],
+    writes=['classname:bee2_coop_response', 'targetname:@glados'],
+)
 def generate_coop_responses(ctx: Context) -> None:
     """If the entities are present, add the coop response script."""
     responses: Dict[str, List[str]] = {}
@@ -1,10 +1,11 @@
 """Transformations related to entity filters."""
 from io import BytesIO
-from typing import Dict
+from typing import Dict, FrozenSet
 
-from srctools.bsp_transform import Context, trans
+from srctools.bsp_transform import Context
 import srctools.logger
 from srctools.packlist import FileType
+from postcomp import transform
 
 
 LOGGER = srctools.logger.get_logger(__name__)
@@ -26,31 +27,47 @@ class __BEE2_CUBE_FUNC__{
 '''
 
 
-@trans('BEE2: Cube VScript Filters')
+@transform(
+    'BEE2: Cube VScript Filters',
+    reads=['classname:bee2_cube_filter_script'],
+    writes=['classname:bee2_cube_filter_script', 'pack'],
+)
 def cube_filter(ctx: Context) -> None:
     """Generate and pack scripts duplicating the filter functionality for VScript."""
-    # Build it up as a binary buffer, since we don't need to do difficult
-    # encoding.
-    script_buffers: Dict[str, BytesIO] = {}
+    # Filename -> function name -> models. Filters often use the same
+    # models, so each set is written once per script and shared.
+    scripts: Dict[str, Dict[str, FrozenSet[str]]] = {}
 
     for ent in ctx.vmf.by_class['bee2_cube_filter_script']:
         ent.remove()
-        filename = ent['filename']
-        try:
-            buffer = script_buffers[filename]
-        except KeyError:
-            buffer = script_buffers[filename] = BytesIO()
-            buffer.write(VSCRIPT_CLOSURE)
-
-        buffer.write(ent['function'].encode() + b' <- __BEE2_CUBE_FUNC__({\n')
-        for key, value in ent.keys.items():
-            if key.startswith('mdl'):
-                buffer.write(b' ["%s"]=1,\n' % value.encode())
-        buffer.write(b'});\n')
-
-    LOGGER.info('Script buffers: {}', list(script_buffers))
-
-    for filename, buffer in script_buffers.items():
+        scripts.setdefault(ent['filename'], {})[ent['function']] = frozenset({
+            value for key, value in ent.keys.items()
+            if key.startswith('mdl')
+        })
+
+    LOGGER.info('Script buffers: {}', list(scripts))
+
+    for filename, functions in scripts.items():
+        # Build it up as a binary buffer, since we don't need to do difficult
+        # encoding.
+        buffer = BytesIO()
+        buffer.write(VSCRIPT_CLOSURE)
+        tables: Dict[FrozenSet[str], bytes] = {}
+        for function, models in functions.items():
+            try:
+                table = tables[models]
+            except KeyError:
+                table = tables[models] = b'__bee2_models_%d' % len(tables)
+                # Sort, so the script is the same each compile.
+                buffer.write(b'local %s = {\n' % table)
+                for model in sorted(models):
+                    buffer.write(b' ["%s"]=1,\n' % model.encode())
+                buffer.write(b'};\n')
+            buffer.write(
+                function.encode() +
+                b' <- __BEE2_CUBE_FUNC__(%s);\n' % table
+            )
+
         ctx.pack.pack_file(
             'scripts/vscripts/' + filename,
             FileType.VSCRIPT_SQUIRREL,
@@ -4,7 +4,7 @@ from enum import Enum
 from typing import Dict, Tuple, List, Set, Callable
 
 from precomp import (
-    texturing, options, packing,
+    texturing, options, packing, instance_index,
     template_brush,
 )
 import consts
@@ -73,10 +73,8 @@ def parse_map(vmf: VMF, has_attr: Dict[str, bool]) -> None:
             brush_ent.remove()
             BARRIERS[get_pos_norm(pos)] = BarrierType.GRATING
 
-    for inst in vmf.by_class['func_instance']:
-        filename = inst['file'].casefold()
-        if filename == glass_inst:
-            inst.remove()
+    for inst in instance_index.by_file(glass_inst):
+        inst.remove()
 
     if options.get(str, 'glass_pack') and has_attr['glass']:
         packing.pack_list(vmf, options.get(str, 'glass_pack'))
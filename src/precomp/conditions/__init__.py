@@ -26,20 +26,21 @@ import inspect
 import io
 import itertools
 import math
+import os
 import random
 from collections import defaultdict
 from decimal import Decimal
-from enum import Enum
+from enum import Enum, Flag
 
 from typing import (
-    Callable, Any, Iterable, Optional,
+    Callable, Any, Iterable, Iterator, Optional,
     Dict, List, Tuple, NamedTuple, TypeVar,
     Union,
     Set,
     TextIO,
 )
 
-from precomp import instanceLocs
+from precomp import instanceLocs, options
 import consts
 import srctools.logger
 import utils
@@ -57,6 +58,7 @@ LOGGER = srctools.logger.get_logger(__name__, alias='cond.core')
 
 # Stuff we get from VBSP in init()
 GLOBAL_INSTANCES = set()  # type: Set[str]
+# Casefolded filenames of every instance.
 ALL_INST = set()  # type: Set[str]
 
 conditions: List['Condition'] = []
@@ -64,10 +66,32 @@ FLAG_LOOKUP = {}  # type: Dict[str, Callable[[srctools.VMF, Entity, Property], b
 RESULT_LOOKUP = {}  # type: Dict[str, Callable[[srctools.VMF, Entity, Property], object]]
 RESULT_SETUP = {}  # type: Dict[str, Callable[[srctools.VMF, Property], object]]
 
+# For cacheable flags, the state they depend on.
+FLAG_DEPS = {}  # type: Dict[str, InstState]
+# For results, the state they modify. If not present, it could be anything.
+RESULT_MODIFIES = {}  # type: Dict[str, InstState]
+
+# Set after a result which doesn't declare what it modifies has run, since it
+# could have added, removed or refiled instances. Then the instance index
+# needs to be refreshed before the next condition.
+_index_stale = True
+
+# Counts results which could have renamed instances, so a condition using
+# the instance index knows to look for more instances that now match.
+_file_changes = 0
+
+# If enabled, cached flag results for each instance.
+# inst -> (flag name, value) -> result
+_FLAG_CACHE = {}  # type: Dict[Entity, Dict[Tuple[str, str], bool]]
+_flag_cache_enabled = False
+_flag_cache_hits = _flag_cache_misses = 0
+
 # Used to dump a list of the flags, results, meta-conditions
 ALL_FLAGS = []  # type: List[Tuple[str, Iterable[str], Callable[[srctools.VMF, Entity, Property], bool]]]
 ALL_RESULTS = []  # type: List[Tuple[str, Iterable[str], Callable[[srctools.VMF, Entity, Property], bool]]]
 ALL_META = []  # type: List[Tuple[str, Decimal, Callable[[srctools.VMF], None]]]
+# Set once import_conditions() has imported every module.
+_imported_all = False
 
 # A template shaped like embeddedVoxel blocks
 TEMP_EMBEDDED_VOXEL = 'BEE2_EMBEDDED_VOXEL'
@@ -159,6 +183,21 @@ PETI_INST_ANGLE = {
 del xp, xn, yp, yn, zp, zn
 
 
+class InstState(Flag):
+    """Parts of an instance's state a flag result can depend on.
+
+    Flags declaring this can have their results cached. Results declare what
+    they modify, so the cache can be invalidated.
+    """
+    NONE = 0  # Only depends on the flag value and the instance itself.
+    FILE = 1  # The instance filename.
+    FIXUPS = 2  # $fixup values.
+    ANGLES = 4  # Origin and angles.
+    TRAITS = 8  # instance_traits.
+    VOXELS = 16  # brushLoc.POS and tiling - this is shared by all instances.
+    ALL = FILE | FIXUPS | ANGLES | TRAITS | VOXELS
+
+
 class NextInstance(Exception):
     """Raised to skip to the next instance, from the SkipInstance result."""
     pass
@@ -259,8 +298,12 @@ class Condition:
     @staticmethod
     def setup_result(vmf: VMF, res_list: List[Property], result: Property, source: Optional[str]='') -> None:
         """Helper method to perform result setup."""
+        global _index_stale
+        load_result(result.name)
         func = RESULT_SETUP.get(result.name)
         if func:
+            if result.name not in RESULT_MODIFIES:
+                _index_stale = True
             # noinspection PyBroadException
             try:
                 result.value = func(vmf, result)
@@ -284,9 +327,12 @@ class Condition:
     @staticmethod
     def test_result(inst: Entity, res: Property) -> Union[bool, object]:
         """Execute the given result."""
+        global _index_stale, _file_changes
         try:
             func = RESULT_LOOKUP[res.name]
         except KeyError:
+            if load_result(res.name):
+                return Condition.test_result(inst, res)
             err_msg = '"{name}" is not a valid condition result!'.format(
                 name=res.real_name,
             )
@@ -298,7 +344,58 @@ class Condition:
                 # Delete this so it doesn't re-fire..
                 return RES_EXHAUSTED
         else:
-            return func(inst.map, inst, res)
+            try:
+                return func(inst.map, inst, res)
+            finally:
+                modifies = RESULT_MODIFIES.get(res.name)
+                if modifies is None:
+                    _index_stale = True
+                    _file_changes += 1
+                elif modifies & InstState.FILE:
+                    _file_changes += 1
+                if _flag_cache_enabled:
+                    invalidate_flags(inst, modifies)
+
+    def candidates(self, vmf: VMF) -> Iterator[Entity]:
+        """Yield the instances this condition could possibly apply to.
+
+        If the first flag is a plain instance check, the instance index can
+        find those directly. Like checking every instance in the map, an
+        instance which one of this condition's results renames to match is
+        also checked, but instances added while it runs are not.
+        """
+        global _index_stale
+        from precomp import instance_index
+        if (
+            not self.flags or self.else_results
+            or self.flags[0].name != 'instance'
+            or self.flags[0].has_children()
+        ):
+            yield from vmf.by_class['func_instance']
+            return
+
+        files = instanceLocs.resolve_filter(self.flags[0].value)
+        serial = instance_index.current_serial()
+        seen = set()  # type: Set[Entity]
+        insts = instance_index.by_file(files)
+        while insts:
+            changes = _file_changes
+            for inst in insts:
+                seen.add(inst)
+                yield inst
+                if _file_changes != changes:
+                    break
+            else:
+                return
+            # Other instances could have been renamed to match, look again.
+            if _index_stale:
+                instance_index.refresh()
+                _index_stale = False
+            insts = [
+                inst for inst in instance_index.by_file(files)
+                if inst not in seen
+                and not instance_index.added_since(inst, serial)
+            ]
 
     def test(self, inst: Entity) -> None:
         """Try to satisfy this condition on the given instance."""
@@ -436,8 +533,16 @@ def meta_cond(priority=0, only_once=True):
     return x
 
 
-def make_flag(orig_name: str, *aliases: str):
-    """Decorator to add flags to the lookup."""
+def make_flag(
+    orig_name: str,
+    *aliases: str,
+    depends: Optional[InstState]=None,
+):
+    """Decorator to add flags to the lookup.
+
+    If depends is set, the flag only depends on that state of the instance,
+    and its results can be cached.
+    """
     def x(func):
         try:
             func.group = func.__globals__['COND_MOD_NAME']
@@ -452,12 +557,24 @@ def make_flag(orig_name: str, *aliases: str):
         FLAG_LOOKUP[orig_name.casefold()] = wrapper
         for name in aliases:
             FLAG_LOOKUP[name.casefold()] = wrapper
+        if depends is not None:
+            FLAG_DEPS[orig_name.casefold()] = depends
+            for name in aliases:
+                FLAG_DEPS[name.casefold()] = depends
         return func
     return x
 
 
-def make_result(orig_name: str, *aliases: str):
-    """Decorator to add results to the lookup."""
+def make_result(
+    orig_name: str,
+    *aliases: str,
+    modifies: Optional[InstState]=None,
+):
+    """Decorator to add results to the lookup.
+
+    modifies is the state of the current instance this result changes.
+    If not set, it's assumed the result could change anything.
+    """
     folded_name = orig_name.casefold()
     # Discard the original name from aliases, if it's also there.
     aliases = tuple([
@@ -479,6 +596,10 @@ def make_result(orig_name: str, *aliases: str):
         RESULT_LOOKUP[folded_name] = wrapper
         for name in aliases:
             RESULT_LOOKUP[name.casefold()] = wrapper
+        if modifies is not None:
+            RESULT_MODIFIES[folded_name] = modifies
+            for name in aliases:
+                RESULT_MODIFIES[name.casefold()] = modifies
         return func
     return x
 
@@ -505,7 +626,7 @@ def init(seed: str, inst_list: Set[str], vmf_file: VMF) -> None:
     # Get a bunch of values from VBSP
     global MAP_RAND_SEED
     MAP_RAND_SEED = seed
-    ALL_INST.update(inst_list)
+    ALL_INST.update(file.casefold() for file in inst_list)
 
     # Sort by priority, where higher = done later
     zero = Decimal(0)
@@ -514,11 +635,20 @@ def init(seed: str, inst_list: Set[str], vmf_file: VMF) -> None:
 
 def check_all(vmf: VMF) -> None:
     """Check all conditions."""
+    global _flag_cache_enabled, _index_stale
+    from precomp import instance_index
     LOGGER.info('Checking Conditions...')
     LOGGER.info('-----------------------')
+    _flag_cache_enabled = options.get(bool, 'cache_flags')
+    _FLAG_CACHE.clear()
     for condition in conditions:
         condition.setup(vmf)
-        for inst in vmf.by_class['func_instance']:
+        if _index_stale:
+            # Results which declare what they modify keep the index updated,
+            # but others could have changed anything.
+            instance_index.refresh()
+            _index_stale = False
+        for inst in condition.candidates(vmf):
             try:
                 condition.test(inst)
             except NextInstance:
@@ -550,15 +680,21 @@ def check_all(vmf: VMF) -> None:
         vbsp.settings['has_attr'].items()
         if value
     ])
-    # Dynamically added by lru_cache()
-    # noinspection PyUnresolvedReferences
-    LOGGER.info('instanceLocs cache: {}', instanceLocs.resolve.cache_info())
+    LOGGER.info('instanceLocs cache: {}', instanceLocs.cache_info())
+    if _flag_cache_enabled:
+        LOGGER.info(
+            'Flag cache: {} hits, {} misses',
+            _flag_cache_hits, _flag_cache_misses,
+        )
+        _flag_cache_enabled = False
+        _FLAG_CACHE.clear()
     LOGGER.info('Style Vars: {}', dict(vbsp.settings['style_vars']))
     LOGGER.info('Global instances: {}', GLOBAL_INSTANCES)
 
 
 def check_flag(vmf: VMF, flag: Property, inst: Entity) -> bool:
     """Determine the result for a condition flag."""
+    global _flag_cache_hits, _flag_cache_misses
     name = flag.name
     # If starting with '!', invert the result.
     if name[:1] == '!':
@@ -569,6 +705,8 @@ def check_flag(vmf: VMF, flag: Property, inst: Entity) -> bool:
     try:
         func = FLAG_LOOKUP[name]
     except KeyError:
+        if load_flag(name):
+            return check_flag(vmf, flag, inst)
         err_msg = '"{}" is not a valid condition flag!'.format(name)
         if utils.DEV_MODE:
             # Crash here.
@@ -578,15 +716,51 @@ def check_flag(vmf: VMF, flag: Property, inst: Entity) -> bool:
             # Skip these conditions..
             return False
 
-    res = func(vmf, inst, flag)
+    if _flag_cache_enabled and name in FLAG_DEPS and not flag.has_children():
+        key = (name, flag.value)
+        inst_cache = _FLAG_CACHE.setdefault(inst, {})
+        try:
+            res = inst_cache[key]
+        except KeyError:
+            _flag_cache_misses += 1
+            res = inst_cache[key] = func(vmf, inst, flag)
+        else:
+            _flag_cache_hits += 1
+    else:
+        res = func(vmf, inst, flag)
     return res == desired_result
 
 
+def invalidate_flags(inst: Entity, state: Optional[InstState]) -> None:
+    """Remove cached flag results, after a result modifies this state.
+
+    If state is None, anything could have changed so the whole cache is
+    cleared. VOXELS is shared by all instances, so that affects them all.
+    """
+    if state is None:
+        _FLAG_CACHE.clear()
+        return
+    if not state:
+        return
+    if state & InstState.VOXELS:
+        caches = list(_FLAG_CACHE.values())
+    else:
+        try:
+            caches = [_FLAG_CACHE[inst]]
+        except KeyError:
+            return
+    for inst_cache in caches:
+        for key in list(inst_cache):
+            if FLAG_DEPS[key[0]] & state:
+                del inst_cache[key]
+
+
 def import_conditions() -> None:
     """Import all the components of the conditions package.
 
     This ensures everything gets registered.
     """
+    global _imported_all
     import importlib
     import pkgutil
     # Find the modules in the conditions package.
@@ -618,6 +792,104 @@ def import_conditions() -> None:
         LOGGER.debug('Importing {} ...', module)
         importlib.import_module(module)
     LOGGER.info('Imported all conditions modules!')
+    _imported_all = True
+
+
+def import_meta_conditions() -> None:
+    """Import just the modules which define metaconditions.
+
+    These have to be present before the conditions are sorted by priority.
+    The modules for other flags and results are imported when they're first
+    used, using the names in the manifest.
+    """
+    import importlib
+    from precomp.conditions import _manifest
+    for module in _manifest.META_MODULES:
+        importlib.import_module(module)
+
+
+def _load_name(lookup: Dict[str, Any], modules: Dict[str, str], name: str) -> bool:
+    """Import the module which defines this flag or result.
+
+    Returns whether it is now defined. If it isn't in the manifest, all the
+    modules are imported to find it.
+    """
+    import importlib
+    try:
+        module = modules[name]
+    except KeyError:
+        pass
+    else:
+        importlib.import_module(module)
+        if name in lookup:
+            return True
+    if not _imported_all:
+        import_conditions()
+        if name in lookup:
+            LOGGER.warning(
+                '"{}" is missing from the conditions manifest, '
+                'it needs to be regenerated!', name,
+            )
+            return True
+    return False
+
+
+def load_flag(name: str) -> bool:
+    """Import the module defining this flag, returning if it is valid."""
+    from precomp.conditions import _manifest
+    return name in FLAG_LOOKUP or _load_name(FLAG_LOOKUP, _manifest.FLAGS, name)
+
+
+def load_result(name: str) -> bool:
+    """Import the module defining this result and its setup, returning if it is valid."""
+    from precomp.conditions import _manifest
+    if name not in RESULT_SETUP and name in _manifest.RESULT_SETUP:
+        _load_name(RESULT_SETUP, _manifest.RESULT_SETUP, name)
+    return name in RESULT_LOOKUP or _load_name(RESULT_LOOKUP, _manifest.RESULTS, name)
+
+
+def write_manifest() -> None:
+    """Regenerate the manifest of which module defines each flag and result.
+
+    This imports all the modules, so the registered names are found.
+    """
+    import_conditions()
+
+    def module_for(func: Callable[..., Any]) -> Optional[str]:
+        """Find the module for the function, not our wrapper.
+
+        Names registered by other modules are always imported already,
+        so they're skipped.
+        """
+        module = inspect.unwrap(func).__module__
+        if module.startswith(__name__ + '.'):
+            return module
+        return None
+
+    with open(os.path.join(__path__[0], '_manifest.py'), 'w') as f:
+        f.write(
+            '"""Lists the module each condition flag and result is defined in.\n\n'
+            'This is generated by conditions.write_manifest(), don\'t edit it.\n'
+            '"""\n'
+        )
+        for var_name, lookup in [
+            ('FLAGS', FLAG_LOOKUP),
+            ('RESULTS', RESULT_LOOKUP),
+            ('RESULT_SETUP', RESULT_SETUP),
+        ]:
+            f.write('\n{} = {{\n'.format(var_name))
+            for name, func in sorted(lookup.items()):
+                module = module_for(func)
+                if module is not None:
+                    f.write('    {!r}: {!r},\n'.format(name, module))
+            f.write('}\n')
+        f.write('\nMETA_MODULES = [\n')
+        for module in sorted({
+            module_for(func) for name, prio, func in ALL_META
+        } - {None}):
+            f.write('    {!r},\n'.format(module))
+        f.write(']\n')
+    LOGGER.info('Wrote conditions manifest.')
 
 
 def build_itemclass_dict(prop_block: Property) -> None:
@@ -817,9 +1089,11 @@ def add_output(inst: Entity, prop: Property, target: str) -> None:
 def add_suffix(inst: Entity, suff: str) -> None:
     """Append the given suffix to the instance.
     """
+    from precomp import instance_index
     file = inst['file']
     old_name, dot, ext = file.partition('.')
     inst['file'] = ''.join((old_name, suff, dot, ext))
+    instance_index.update(inst)
 
 
 def local_name(inst: Entity, name: Union[str, Entity]) -> str:
@@ -1020,7 +1294,7 @@ def set_random_seed(inst: Entity, seed: str) -> None:
 
 
 @make_flag('debug')
-@make_result('debug')
+@make_result('debug', modifies=InstState.NONE)
 def debug_flag(inst: Entity, props: Property):
     """Displays text when executed, for debugging conditions.
 
@@ -1038,7 +1312,7 @@ def debug_flag(inst: Entity, props: Property):
     return True  # The flag is always true
 
 
-@make_result('dummy', 'nop', 'do_nothing')
+@make_result('dummy', 'nop', 'do_nothing', modifies=InstState.NONE)
 def dummy_result(inst: Entity, props: Property):
     """Dummy result that doesn't do anything."""
     pass
@@ -1133,13 +1407,13 @@ def res_sub_condition_setup(vmf: VMF, res: Property):
     return cond
 
 
-@make_result('condition')
+@make_result('condition', modifies=InstState.NONE)
 def res_sub_condition(base_inst: Entity, res: Property):
     """Check a different condition if the outer block is true."""
     res.value.test(base_inst)
 
 
-@make_result('nextInstance')
+@make_result('nextInstance', modifies=InstState.NONE)
 def res_break() -> None:
     """Skip to the next instance.
 
@@ -1148,7 +1422,7 @@ def res_break() -> None:
     raise NextInstance
 
 
-@make_result('endCondition', 'nextCondition')
+@make_result('endCondition', 'nextCondition', modifies=InstState.NONE)
 def res_end_condition() -> None:
     """Skip to the next condition.
 
@@ -1203,7 +1477,7 @@ def res_switch_setup(vmf: VMF, res: Property):
     )
 
 
-@make_result('switch')
+@make_result('switch', modifies=InstState.NONE)
 def res_switch(vmf: VMF, inst: Entity, res: Property):
     """Run the same flag multiple times with different arguments.
 
@@ -1286,6 +1560,7 @@ def make_static_pist(vmf: srctools.VMF, ent: Entity, res: Property):
     Alternatively, specify all instances via editoritems, by setting the value
     to the item ID optionally followed by a :prefix.
     """
+    from precomp import instance_index
 
     bottom_pos = ent.fixup.int(consts.FixupVars.PIST_BTM, 0)
 
@@ -1299,6 +1574,7 @@ def make_static_pist(vmf: srctools.VMF, ent: Entity, res: Property):
         val = res.value['bottom_' + str(bottom_pos)]
         if val:  # Only if defined
             ent['file'] = val
+            instance_index.update(ent)
 
         logic_file = res.value['logic_' + str(bottom_pos)]
         if logic_file:
@@ -1308,6 +1584,7 @@ def make_static_pist(vmf: srctools.VMF, ent: Entity, res: Property):
             logic_ent = ent.copy()
             logic_ent['file'] = logic_file
             vmf.add_ent(logic_ent)
+            instance_index.update(logic_ent)
             # If no connections are present, set the 'enable' value in
             # the logic to True so the piston can function
             logic_ent.fixup[consts.FixupVars.BEE_PIST_MANAGER_A] = (
@@ -1324,6 +1601,7 @@ def make_static_pist(vmf: srctools.VMF, ent: Entity, res: Property):
         val = res.value['static_' + str(pos)]
         if val:
             ent['file'] = val
+            instance_index.update(ent)
 
     # Add in the grating for the bottom as an overlay.
     # It's low to fit the piston at minimum, or higher if needed.
@@ -1336,6 +1614,7 @@ def make_static_pist(vmf: srctools.VMF, ent: Entity, res: Property):
         grate_ent = ent.copy()
         grate_ent['file'] = grate
         vmf.add_ent(grate_ent)
+        instance_index.update(grate_ent)
 
 
 @make_result('GooDebris')
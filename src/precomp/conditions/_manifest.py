@@ -0,0 +1,178 @@
+"""Lists the module each condition flag and result is defined in.
+
+This is generated by conditions.write_manifest(), don't edit it.
+"""
+
+FLAGS = {
+    'and': 'precomp.conditions.logical',
+    'angle': 'precomp.conditions.positioning',
+    'angles': 'precomp.conditions.positioning',
+    'blocktype': 'precomp.conditions.positioning',
+    'dir': 'precomp.conditions.positioning',
+    'direction': 'precomp.conditions.positioning',
+    'faithtype': 'precomp.conditions.faithplate',
+    'fizzlertype': 'precomp.conditions.fizzler',
+    'game': 'precomp.conditions.globals',
+    'gamemode': 'precomp.conditions.globals',
+    'has': 'precomp.conditions.globals',
+    'has_char': 'precomp.conditions.globals',
+    'has_music': 'precomp.conditions.globals',
+    'hascaveportrait': 'precomp.conditions.globals',
+    'hasexitsignage': 'precomp.conditions.globals',
+    'hasinst': 'precomp.conditions.instances',
+    'hastrait': 'precomp.conditions.instances',
+    'ifmode': 'precomp.conditions.globals',
+    'ifpreview': 'precomp.conditions.globals',
+    'instance': 'precomp.conditions.instances',
+    'instflag': 'precomp.conditions.instances',
+    'instpart': 'precomp.conditions.instances',
+    'instvar': 'precomp.conditions.instances',
+    'iscoop': 'precomp.conditions.globals',
+    'itemconfig': 'precomp.conditions.globals',
+    'lockingio': 'precomp.conditions.removed',
+    'nand': 'precomp.conditions.logical',
+    'nor': 'precomp.conditions.logical',
+    'not': 'precomp.conditions.logical',
+    'offsetdist': 'precomp.conditions.instances',
+    'or': 'precomp.conditions.logical',
+    'orient': 'precomp.conditions.positioning',
+    'orientation': 'precomp.conditions.positioning',
+    'posisgoo': 'precomp.conditions.positioning',
+    'posissolid': 'precomp.conditions.positioning',
+    'preview': 'precomp.conditions.globals',
+    'random': 'precomp.conditions.randomise',
+    'rotation': 'precomp.conditions.positioning',
+    'stylevar': 'precomp.conditions.globals',
+    'xor': 'precomp.conditions.logical',
+}
+
+RESULTS = {
+    'addbrush': 'precomp.conditions.brushes',
+    'addcaveportrait': 'precomp.conditions.addInstance',
+    'addglobal': 'precomp.conditions.addInstance',
+    'addoutput': 'precomp.conditions.connections',
+    'addoverlay': 'precomp.conditions.addInstance',
+    'addplacementhelper': 'precomp.conditions.brushes',
+    'alterface': 'precomp.conditions.brushes',
+    'alterpaneloptions': 'precomp.conditions.brushes',
+    'alterpanelopts': 'precomp.conditions.brushes',
+    'alterpanoptions': 'precomp.conditions.brushes',
+    'alterpanopts': 'precomp.conditions.brushes',
+    'altertex': 'precomp.conditions.brushes',
+    'altertexture': 'precomp.conditions.brushes',
+    'antlaser': 'precomp.conditions.antlaser',
+    'atlas_spawnpoint': 'precomp.conditions.apTag',
+    'breakableglass': 'precomp.conditions.glass',
+    'camera': 'precomp.conditions.monitor',
+    'changefizzlertype': 'precomp.conditions.fizzler',
+    'changeinputs': 'precomp.conditions.custItems',
+    'changeinstance': 'precomp.conditions.instances',
+    'changeoutputs': 'precomp.conditions.custItems',
+    'checkpointtrigger': 'precomp.conditions.brushes',
+    'clearoutput': 'precomp.conditions.instances',
+    'clearoutputs': 'precomp.conditions.instances',
+    'conveyorbelt': 'precomp.conditions.conveyorBelt',
+    'createentity': 'precomp.conditions.entities',
+    'createpanel': 'precomp.conditions.brushes',
+    'custantline': 'precomp.conditions.custItems',
+    'custvactube': 'precomp.conditions.vactubes',
+    'cutouttile': 'precomp.conditions.cutoutTile',
+    'deletefixup': 'precomp.conditions.instances',
+    'deleteinstvar': 'precomp.conditions.instances',
+    'faithbullseye': 'precomp.conditions.removed',
+    'faithmods': 'precomp.conditions.faithplate',
+    'forceupright': 'precomp.conditions.positioning',
+    'funnellight': 'precomp.conditions.entities',
+    'genrotatingent': 'precomp.conditions.brushes',
+    'getitemconfig': 'precomp.conditions.globals',
+    'globalinput': 'precomp.conditions.instances',
+    'has': 'precomp.conditions.globals',
+    'hollowbrush': 'precomp.conditions.removed',
+    'instsuffix': 'precomp.conditions.instances',
+    'instvar': 'precomp.conditions.instances',
+    'instvarsuffix': 'precomp.conditions.instances',
+    'localtarget': 'precomp.conditions.instances',
+    'makecatwalk': 'precomp.conditions.catwalks',
+    'mapinstvar': 'precomp.conditions.instances',
+    'marklocking': 'precomp.conditions.removed',
+    'monitor': 'precomp.conditions.monitor',
+    'offsetinst': 'precomp.conditions.positioning',
+    'offsetinstance': 'precomp.conditions.positioning',
+    'operation': 'precomp.conditions.python',
+    'oppositewalldist': 'precomp.conditions.positioning',
+    'overlayinst': 'precomp.conditions.addInstance',
+    'pistonplatform': 'precomp.conditions.piston_platform',
+    'precachemodel': 'precomp.conditions.globals',
+    'python': 'precomp.conditions.python',
+    'random': 'precomp.conditions.randomise',
+    'randomnum': 'precomp.conditions.randomise',
+    'randomshift': 'precomp.conditions.randomise',
+    'randomvec': 'precomp.conditions.randomise',
+    'readsurftype': 'precomp.conditions.positioning',
+    'removefixup': 'precomp.conditions.instances',
+    'removeinstvar': 'precomp.conditions.instances',
+    'rename': 'precomp.conditions.instances',
+    'replaceinstance': 'precomp.conditions.instances',
+    'reshapefizzler': 'precomp.conditions.fizzler',
+    'resizeabletrigger': 'precomp.conditions.resizableTrigger',
+    'scriptvar': 'precomp.conditions.instances',
+    'sendificator': 'precomp.conditions.sendificator',
+    'sendificatorlaser': 'precomp.conditions.sendificator',
+    'setangles': 'precomp.conditions.positioning',
+    'setblock': 'precomp.conditions.positioning',
+    'setfaith': 'precomp.conditions.faithplate',
+    'setfaithattr': 'precomp.conditions.faithplate',
+    'setfaithattrs': 'precomp.conditions.faithplate',
+    'setinstvar': 'precomp.conditions.instances',
+    'setkey': 'precomp.conditions.instances',
+    'setoption': 'precomp.conditions.globals',
+    'setpaneloptions': 'precomp.conditions.brushes',
+    'setpanelopts': 'precomp.conditions.brushes',
+    'setpanoptions': 'precomp.conditions.brushes',
+    'setpanopts': 'precomp.conditions.brushes',
+    'settile': 'precomp.conditions.brushes',
+    'settiles': 'precomp.conditions.brushes',
+    'signageitem': 'precomp.conditions.signage',
+    'stylevar': 'precomp.conditions.globals',
+    'suffix': 'precomp.conditions.instances',
+    'tagfizzler': 'precomp.conditions.apTag',
+    'templatebrush': 'precomp.conditions.brushes',
+    'templateoverlay': 'precomp.conditions.entities',
+    'trackplatform': 'precomp.conditions.trackPlat',
+    'transferbullseye': 'precomp.conditions.brushes',
+    'unstscaffold': 'precomp.conditions.scaffold',
+    'variant': 'precomp.conditions.randomise',
+    'watersplash': 'precomp.conditions.entities',
+}
+
+RESULT_SETUP = {
+    'addoutput': 'precomp.conditions.connections',
+    'breakableglass': 'precomp.conditions.glass',
+    'camera': 'precomp.conditions.monitor',
+    'custantline': 'precomp.conditions.custItems',
+    'custvactube': 'precomp.conditions.vactubes',
+    'globalinput': 'precomp.conditions.instances',
+    'mapinstvar': 'precomp.conditions.instances',
+    'monitor': 'precomp.conditions.monitor',
+    'operation': 'precomp.conditions.python',
+    'pistonplatform': 'precomp.conditions.piston_platform',
+    'python': 'precomp.conditions.python',
+    'random': 'precomp.conditions.randomise',
+    'randomshift': 'precomp.conditions.randomise',
+    'sendificatorlaser': 'precomp.conditions.sendificator',
+    'setfaith': 'precomp.conditions.faithplate',
+    'setfaithattr': 'precomp.conditions.faithplate',
+    'setfaithattrs': 'precomp.conditions.faithplate',
+    'tagfizzler': 'precomp.conditions.apTag',
+    'templatebrush': 'precomp.conditions.brushes',
+    'templateoverlay': 'precomp.conditions.entities',
+    'unstscaffold': 'precomp.conditions.scaffold',
+    'variant': 'precomp.conditions.randomise',
+    'watersplash': 'precomp.conditions.entities',
+}
+
+META_MODULES = [
+    'precomp.conditions.apTag',
+    'precomp.conditions.monitor',
+    'precomp.conditions.vactubes',
+]
@@ -3,7 +3,7 @@
 from enum import Enum
 from typing import Dict, List, Tuple, Set, FrozenSet, Callable, Union
 
-from precomp import instanceLocs, connections, conditions
+from precomp import instanceLocs, instance_index, connections, conditions
 import srctools.logger
 from precomp.conditions import make_result
 from precomp.connections import Item
@@ -121,9 +121,7 @@ def res_antlaser(vmf: VMF, res: Property):
     # Find all the markers.
     nodes = {}  # type: Dict[str, Item]
 
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in conf_inst:
-            continue
+    for inst in instance_index.by_file(conf_inst):
         name = inst['targetname']
         try:
             # Remove the item - it's no longer going to exist after
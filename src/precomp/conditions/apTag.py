@@ -6,7 +6,7 @@ import os
 from srctools import Vec, Property, VMF, Entity, Output
 import srctools.logger
 
-from precomp import instanceLocs, options
+from precomp import instanceLocs, instance_index, options
 from precomp.conditions import (
     meta_cond, make_result,
     PETI_INST_ANGLE, RES_EXHAUSTED,
@@ -112,10 +112,9 @@ def ap_tag_modifications(vmf: VMF):
     has['spawn_nogun'] = True
 
     transition_ents = instanceLocs.get_special_inst('transitionents')
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in transition_ents:
-            continue
+    for inst in instance_index.by_file(transition_ents):
         inst['file'] = 'instances/bee2/transition_ents_tag.vmf'
+        instance_index.update(inst)
 
     # Because of a bug in P2, these folders aren't created automatically.
     # We need a folder with the user's ID in portal2/maps/puzzlemaker.
@@ -253,6 +252,7 @@ def res_make_tag_fizzler(vmf: VMF, inst: Entity, res: Property):
 
     if disable_other or (blue_enabled and oran_enabled):
         inst['file'] = inst_frame_double
+        instance_index.update(inst)
         # On a wall, and pointing vertically
         if inst_normal.z == 0 and Vec(y=1).rotate(*inst_angle).z:
             # They're vertical, make sure blue's on top!
@@ -269,6 +269,7 @@ def res_make_tag_fizzler(vmf: VMF, inst: Entity, res: Property):
             oran_loc = loc - offset
     else:
         inst['file'] = inst_frame_single
+        instance_index.update(inst)
         # They're always centered
         blue_loc = loc
         oran_loc = loc
@@ -2,7 +2,7 @@
 from srctools import Vec, Property, VMF, Entity
 import srctools.logger
 
-from precomp import brushLoc, instanceLocs
+from precomp import brushLoc, instanceLocs, instance_index
 from precomp.conditions import make_result, RES_EXHAUSTED, INST_ANGLE
 from precomp.connections import ITEMS
 import utils
@@ -159,9 +159,7 @@ def res_make_catwalk(vmf: VMF, res: Property):
     markers = {}
 
     # Find all our markers, so we can look them up by targetname.
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in marker:
-            continue
+    for inst in instance_index.by_file(marker):
         links[inst] = Link()
         markers[inst['targetname']] = inst
 
@@ -238,18 +236,21 @@ def res_make_catwalk(vmf: VMF, res: Property):
 
         new_type, inst['angles'] = utils.CONN_LOOKUP[dir_mask.as_tuple()]
         inst['file'] = instances[CATWALK_TYPES[new_type]]
+        instance_index.update(inst)
 
         if new_type is utils.CONN_TYPES.side:
             # If the end piece is pointing at a wall, switch the instance.
             if normal.z == 0:
                 if normal == dir_mask.conn_dir():
                     inst['file'] = instances['end_wall']
+                    instance_index.update(inst)
             continue  # We never have normal supports on end pieces
         elif new_type is utils.CONN_TYPES.none:
             # Unconnected catwalks on the wall switch to a special instance.
             # This lets players stand next to a portal surface on the wall.
             if normal.z == 0:
                 inst['file'] = instances['single_wall']
+                instance_index.update(inst)
                 inst['angles'] = INST_ANGLE[normal.as_tuple()]
             else:
                 inst.remove()
@@ -7,7 +7,7 @@ import srctools.logger
 import utils
 import vbsp
 from precomp import (
-    instanceLocs, connections,
+    instanceLocs, instance_index, connections,
     template_brush,
     conditions,
 )
@@ -165,9 +165,7 @@ def res_cutout_tile(vmf: srctools.VMF, res: Property):
             MATS[key] = [default]
 
     # Find our marker ents
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in marker_filenames:
-            continue
+    for inst in instance_index.by_file(marker_filenames):
         targ = inst['targetname']
         normal = Vec(0, 0, 1).rotate_by_str(inst['angles', '0 0 0'])
         # Check the orientation of the marker to figure out what to generate
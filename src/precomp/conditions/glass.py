@@ -4,7 +4,7 @@ from precomp.instanceLocs import resolve as resolve_inst
 from srctools import Property, Vec, VMF, Side, Entity, Output
 
 import srctools.logger
-from precomp import template_brush
+from precomp import template_brush, instance_index
 import consts
 
 from typing import Iterator, Any, Tuple, Dict, List, Optional
@@ -77,11 +77,8 @@ def find_glass_items(config, vmf: VMF) -> Iterator[Tuple[str, Vec, Vec, Vec, dic
     """
     # targetname -> min, max, normal, config
     glass_items = {}  # type: Dict[str, Tuple[Vec, Vec, Vec, dict]]
-    for inst in vmf.by_class['func_instance']:  # type: Entity
-        try:
-            conf = config[inst['file'].casefold()]
-        except KeyError:
-            continue
+    for inst in instance_index.by_file(config):
+        conf = config[inst['file'].casefold()]
         targ = inst['targetname']
         norm = Vec(x=1).rotate_by_str(inst['angles'])
         origin = Vec.from_str(inst['origin']) - 64 * norm
@@ -8,9 +8,9 @@ from typing import Dict, Optional, Union
 import srctools.logger
 from precomp.conditions import (
     make_flag, make_result, make_result_setup,
-    ALL_INST,
+    ALL_INST, InstState,
 )
-from precomp import instance_traits, instanceLocs, conditions
+from precomp import instance_traits, instance_index, instanceLocs, conditions
 from srctools import Property, Vec, Entity, Output, VMF
 
 LOGGER = srctools.logger.get_logger(__name__, 'cond.instances')
@@ -18,30 +18,25 @@ LOGGER = srctools.logger.get_logger(__name__, 'cond.instances')
 COND_MOD_NAME = 'Instances'
 
 
-@make_flag('instance')
+@make_flag('instance', depends=InstState.FILE)
 def flag_file_equal(inst: Entity, flag: Property):
     """Evaluates True if the instance matches the given file."""
-    return inst['file'].casefold() in instanceLocs.resolve(flag.value)
+    return inst['file'].casefold() in instanceLocs.resolve_filter(flag.value)
 
 
-@make_flag('instFlag', 'InstPart')
+@make_flag('instFlag', 'InstPart', depends=InstState.FILE)
 def flag_file_cont(inst: Entity, flag: Property):
     """Evaluates True if the instance contains the given portion."""
     return flag.value in inst['file'].casefold()
 
 
-@make_flag('hasInst')
+@make_flag('hasInst', depends=InstState.NONE)
 def flag_has_inst(flag: Property):
     """Checks if the given instance is present anywhere in the map."""
-    flags = instanceLocs.resolve(flag.value)
-    return any(
-        inst.casefold() in flags
-        for inst in
-        ALL_INST
-    )
+    return not ALL_INST.isdisjoint(instanceLocs.resolve_filter(flag.value))
 
 
-@make_flag('hasTrait')
+@make_flag('hasTrait', depends=InstState.TRAITS)
 def flag_has_trait(inst: Entity, flag: Property):
     """Check if the instance has a specific 'trait', which is set by code.
 
@@ -121,7 +116,7 @@ INSTVAR_COMP = {
 }
 
 
-@make_flag('instVar')
+@make_flag('instVar', depends=InstState.FIXUPS)
 def flag_instvar(inst: Entity, flag: Property):
     """Checks if the $replace value matches the given value.
 
@@ -151,7 +146,7 @@ def flag_instvar(inst: Entity, flag: Property):
         return inst.fixup.bool(flag.value)
 
 
-@make_flag('offsetDist')
+@make_flag('offsetDist', depends=InstState.ANGLES | InstState.FIXUPS)
 def flag_offset_distance(inst: Entity, flag: Property) -> bool:
     """Check if the given instance is in an offset position.
 
@@ -178,13 +173,14 @@ def flag_offset_distance(inst: Entity, flag: Property) -> bool:
     return INSTVAR_COMP.get(op, operator.eq)(offset, value)
 
 
-@make_result('rename', 'changeInstance')
+@make_result('rename', 'changeInstance', modifies=InstState.FILE)
 def res_change_instance(inst: Entity, res: Property):
     """Set the file to a value."""
     inst['file'] = instanceLocs.resolve_one(res.value, error=True)
+    instance_index.update(inst)
 
 
-@make_result('suffix', 'instSuffix')
+@make_result('suffix', 'instSuffix', modifies=InstState.FILE)
 def res_add_suffix(inst: Entity, res: Property):
     """Add the specified suffix to the filename."""
     conditions.add_suffix(inst, '_' + res.value)
@@ -200,7 +196,7 @@ def res_set_key(inst: Entity, res: Property):
     inst[key] = value
 
 
-@make_result('instVar', 'instVarSuffix')
+@make_result('instVar', 'instVarSuffix', modifies=InstState.FILE)
 def res_add_inst_var(inst: Entity, res: Property):
     """Append the value of an instance variable to the filename.
 
@@ -219,7 +215,7 @@ def res_add_inst_var(inst: Entity, res: Property):
         conditions.add_suffix(inst, '_' + inst.fixup[res.value, ''])
 
 
-@make_result('setInstVar')
+@make_result('setInstVar', modifies=InstState.FIXUPS)
 def res_set_inst_var(inst: Entity, res: Property):
     """Set an instance variable to the given value.
 
@@ -243,7 +239,7 @@ def res_map_inst_var_setup(res: Property):
     return out if all(out) else None
 
 
-@make_result('mapInstVar')
+@make_result('mapInstVar', modifies=InstState.FIXUPS)
 def res_map_inst_var(inst: Entity, res: Property):
     """Set one instance var based on the value of another.
 
@@ -256,19 +252,22 @@ def res_map_inst_var(inst: Entity, res: Property):
         pass
 
 
-@make_result('clearOutputs', 'clearOutput')
+@make_result('clearOutputs', 'clearOutput', modifies=InstState.NONE)
 def res_clear_outputs(inst: Entity):
     """Remove the outputs from an instance."""
     inst.outputs.clear()
 
 
-@make_result('removeFixup', 'deleteFixup', 'removeInstVar', 'deleteInstVar')
+@make_result(
+    'removeFixup', 'deleteFixup', 'removeInstVar', 'deleteInstVar',
+    modifies=InstState.FIXUPS,
+)
 def res_rem_fixup(inst: Entity, res: Property):
     """Remove a fixup from the instance."""
     del inst.fixup[res.value]
 
 
-@make_result('localTarget')
+@make_result('localTarget', modifies=InstState.FIXUPS)
 def res_local_targetname(inst: Entity, res: Property):
     """Generate a instvar with an instance-local name.
 
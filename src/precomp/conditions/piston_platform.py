@@ -1,7 +1,7 @@
 """Handles generating Piston Platforms with specific logic."""
 from typing import Dict, List, Optional
 
-from precomp import packing, template_brush, conditions
+from precomp import packing, template_brush, conditions, instance_index
 import srctools.logger
 from consts import FixupVars
 from precomp.conditions import make_result, make_result_setup, local_name
@@ -130,6 +130,7 @@ def res_piston_plat(vmf: VMF, inst: Entity, res: Property) -> None:
             static_inst = inst.copy()
             vmf.add_ent(static_inst)
             static_inst['file'] = inst_filenames['fullstatic_' + str(position)]
+            instance_index.update(static_inst)
             return
 
     init_script = 'SPAWN_UP <- {}'.format('true' if start_up else 'false')
@@ -224,6 +225,7 @@ def res_piston_plat(vmf: VMF, inst: Entity, res: Property) -> None:
         if not pist_ent['file']:
             # No actual instance, remove.
             pist_ent.remove()
+        instance_index.update(pist_ent)
 
         temp_result = template_brush.import_template(
             vmf,
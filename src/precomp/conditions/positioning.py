@@ -3,7 +3,7 @@ from typing import Tuple, Dict, Set
 
 from precomp.conditions import (
     make_flag, make_result, resolve_offset,
-    DIRECTIONS,
+    DIRECTIONS, InstState,
 )
 from precomp import tiling, brushLoc
 from srctools import Vec, Entity, Property
@@ -25,6 +25,7 @@ TILE_PREDICATES: Dict[str, Set[tiling.TileType]] = {}
     'orientation',
     'dir',
     'direction',
+    depends=InstState.ANGLES,
 )
 def flag_angles(inst: Entity, flag: Property):
     """Check that a instance is pointed in a direction.
@@ -7,6 +7,7 @@ from precomp.conditions import (
     make_result, RES_EXHAUSTED,
 )
 from precomp import instanceLocs
+from precomp import instance_index
 from precomp import connections
 from precomp import options
 from precomp import conditions
@@ -55,12 +56,11 @@ def res_resizeable_trigger(vmf: VMF, res: Property):
 
     inst = None
 
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() in marker:
-            marker_names.add(inst['targetname'])
-            # Unconditionally delete from the map, so it doesn't
-            # appear even if placed wrongly.
-            inst.remove()
+    for inst in instance_index.by_file(marker):
+        marker_names.add(inst['targetname'])
+        # Unconditionally delete from the map, so it doesn't
+        # appear even if placed wrongly.
+        inst.remove()
     del inst  # Make sure we don't use this later.
 
     if not marker_names:  # No markers in the map - abort
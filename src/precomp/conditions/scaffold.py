@@ -6,7 +6,7 @@ import math
 from srctools import Vec, Property, VMF
 import srctools.logger
 
-from precomp import instanceLocs, item_chain
+from precomp import instanceLocs, instance_index, item_chain
 from precomp.conditions import make_result, make_result_setup, RES_EXHAUSTED
 
 
@@ -185,6 +185,7 @@ def res_unst_scaffold(vmf: VMF, res: Property):
             new_file = conf.get('inst_' + orient, '')
             if new_file:
                 node.inst['file'] = new_file
+                instance_index.update(node.inst)
 
             if node.prev is None:
                 link_type = LinkType.START
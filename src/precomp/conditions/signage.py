@@ -3,7 +3,7 @@ from typing import Tuple, Dict, Optional, Iterable, List
 from enum import Enum
 
 import srctools.logger
-from precomp import tiling, texturing, template_brush, conditions
+from precomp import tiling, texturing, template_brush, conditions, instance_index
 import consts
 from srctools import Property, Entity, VMF, Vec, NoKeyError
 from srctools.vmf import make_overlay, Side
@@ -152,6 +152,7 @@ def res_signage(vmf: VMF, inst: Entity, res: Property):
     else:
         inst['file'] = res['small_clip', '']
         inst['origin'] = prim_pos if sign_prim else sec_pos
+    instance_index.update(inst)
 
     brush_faces: List[Side] = []
     tiledef: Optional[tiling.TileDef] = None
@@ -5,7 +5,7 @@ import srctools.logger
 from precomp.conditions import (
     make_result, RES_EXHAUSTED,
 )
-from precomp import instanceLocs, conditions
+from precomp import instanceLocs, instance_index, conditions
 from srctools import Vec, Property, Entity, VMF
 
 
@@ -54,8 +54,7 @@ def res_track_plat(vmf: VMF, res: Property):
     track_instances = {
         Vec.from_str(inst['origin']).as_tuple(): inst
         for inst in
-        vmf.by_class['func_instance']
-        if inst['file'].casefold() in track_files
+        instance_index.by_file(track_files)
     }
 
     LOGGER.debug('Track instances:')
@@ -70,10 +69,7 @@ def res_track_plat(vmf: VMF, res: Property):
 
     # Now we loop through all platforms in the map, and then locate their
     # track_set
-    for plat_inst in vmf.by_class['func_instance']:
-        if plat_inst['file'].casefold() not in platforms:
-            continue  # Not a platform!
-
+    for plat_inst in instance_index.by_file(platforms):
         LOGGER.debug('Modifying "' + plat_inst['targetname'] + '"!')
 
         plat_loc = Vec.from_str(plat_inst['origin'])
@@ -100,7 +96,9 @@ def res_track_plat(vmf: VMF, res: Property):
             # Track is one block long, use a single-only instance and
             # remove track!
             plat_inst['file'] = single_plat_inst
+            instance_index.update(plat_inst)
             first_track.remove()
+            instance_index.update(first_track)
             continue  # Next platform
 
         track_set = set()  # type: Set[Entity]
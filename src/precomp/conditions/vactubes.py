@@ -6,7 +6,7 @@ from typing import Dict, Tuple, List, Iterator, Optional
 from srctools import Vec, Vec_tuple, Property, Entity, VMF, Solid
 import srctools.logger
 
-from precomp import tiling, instanceLocs, connections, template_brush
+from precomp import tiling, instanceLocs, instance_index, connections, template_brush
 from precomp.brushLoc import POS as BLOCK_POS
 from precomp.conditions import (
     make_result, make_result_setup, RES_EXHAUSTED,
@@ -182,11 +182,8 @@ def res_make_vactubes(vmf: VMF, res: Property):
     markers: Dict[str, Marker] = {}
 
     # Find all our markers, so we can look them up by targetname.
-    for inst in vmf.by_class['func_instance']:  # type: Entity
-        try:
-            config, inst_size = INST_CONFIGS[inst['file'].casefold()]
-        except KeyError:
-            continue  # Not a marker
+    for inst in instance_index.by_file(INST_CONFIGS):
+        config, inst_size = INST_CONFIGS[inst['file'].casefold()]
 
         # Remove the original instance from the level - we spawn entirely new
         # ones.
@@ -9,7 +9,7 @@ from collections import defaultdict
 from srctools import VMF, Entity, Output, Property, conv_bool, Vec
 from precomp.antlines import Antline, AntType
 from precomp import (
-    instance_traits, instanceLocs,
+    instance_traits, instance_index, instanceLocs,
     options,
     packing,
     conditions,
@@ -1198,6 +1198,7 @@ def gen_item_outputs(vmf: VMF) -> None:
 
         for pan in item.ind_panels:
             pan['file'] = desired_panel_inst
+            instance_index.update(pan)
             pan.fixup[consts.FixupVars.TIM_ENABLED] = item.timer is not None
 
     logic_auto = vmf.create_ent(
@@ -11,7 +11,7 @@ from typing import (
     Dict, List, Set, FrozenSet, Iterable,
 )
 
-from precomp import brushLoc, options, packing, conditions
+from precomp import brushLoc, options, packing, conditions, instance_index
 from precomp.conditions import meta_cond, make_result, make_flag, RES_EXHAUSTED
 from precomp.conditions.globals import precache_model
 from precomp.instanceLocs import resolve as resolve_inst
@@ -1102,7 +1102,7 @@ def res_script_cube_predicate(vmf: VMF, ent: Entity, res: Property) -> None:
         cube_type.add_models(models)
 
     # Normalise the names to a consistent format.
-    model_names = list({
+    model_names = sorted({
         model.lower().replace('\\', '/')
         for model in models
     })
@@ -1142,7 +1142,7 @@ def link_cubes(vmf: VMF):
     # Cube items.
     cubes = []  # type: List[Tuple[Entity, CubeType]]
 
-    for inst in vmf.by_class['func_instance']:
+    for inst in instance_index.by_file(inst_to_type):
         try:
             inst_type = inst_to_type[inst['file'].casefold()]
         except KeyError:
@@ -1269,7 +1269,7 @@ def link_cubes(vmf: VMF):
 
     LOGGER.info('SPLAT File: {}', splat_inst)
 
-    for inst in vmf.by_class['func_instance']:
+    for inst in instance_index.by_file({*colorizer_inst, *splat_inst}):
         file = inst['file'].casefold()
 
         if file in colorizer_inst:
@@ -6,14 +6,13 @@ multiple styles.
 import logging
 import re
 from collections import defaultdict
-from functools import lru_cache
 
 from srctools import Property
 import srctools.logger
 
 from typing import (
-    Optional, Union,
-    List, Dict, Tuple, TypeVar
+    Optional, Union, NamedTuple,
+    List, Dict, Tuple, TypeVar, FrozenSet,
 )
 
 LOGGER = srctools.logger.get_logger(__name__)
@@ -22,6 +21,7 @@ LOGGER = srctools.logger.get_logger(__name__)
 INSTANCE_FILES: Dict[str, List[str]] = {}
 
 # Item ID and index/special name for instances set in editoritems.
+# This is the reverse of the selector lookups.
 # Note this is imperfect - two items could reuse the same instance.
 ITEM_FOR_FILE: Dict[str, Tuple[str, Union[int, str]]] = {}
 
@@ -209,6 +209,21 @@ SUBITEMS: Dict[str, Union[int, Tuple[int, ...]]] = {
     'fizz_model': 1,
 }
 
+# The resolved selectors. These are only cleared when the config is reloaded,
+# since they're constant after that.
+_RESOLVE_CACHE: Dict[str, List[str]] = {}
+# The same, but as frozensets for checking if a file matches.
+_FILTER_CACHE: Dict[str, FrozenSet[str]] = {}
+
+
+class CacheInfo(NamedTuple):
+    """Statistics for the selector cache."""
+    hits: int
+    misses: int
+    currsize: int
+
+_cache_hits = 0
+
 SPECIAL_INST_FOLDED = {
     key.casefold(): value
     for key, value in
@@ -236,6 +251,8 @@ def load_conf(prop_block: Property):
             inst_list.append(file)
             ITEM_FOR_FILE[file] = (prop.name, ind)
 
+    cache_clear()
+
     INST_SPECIAL.clear()
     INST_SPECIAL.update({
         key.casefold(): resolve(val_string, silent=True)
@@ -243,6 +260,13 @@ def load_conf(prop_block: Property):
         SPECIAL_INST.items()
     })
 
+    # Precompile the selectors for every item, since those are the most
+    # commonly used. Others are compiled on first use.
+    for item_id in INSTANCE_FILES:
+        resolve_filter('<{}>'.format(item_id), silent=True)
+    for key in INST_SPECIAL:
+        resolve_filter('[{}]'.format(key), silent=True)
+
 
 def resolve(path: str, silent: bool=False) -> List[str]:
     """Resolve an instance path into the values it refers to.
@@ -267,16 +291,53 @@ def resolve(path: str, silent: bool=False) -> List[str]:
     If silent is True, no error messages will be output (for use with hardcoded
     names).
     """
+    global _cache_hits
+    try:
+        result = _RESOLVE_CACHE[path]
+    except KeyError:
+        pass
+    else:
+        _cache_hits += 1
+        return result
+
     if silent:
         # Ignore messages < ERROR (warning and info)
         log_level = LOGGER.level
         LOGGER.setLevel(logging.ERROR)
         try:
-            return _resolve(path)
+            result = _resolve(path)
         finally:
             LOGGER.setLevel(log_level)
     else:
-        return _resolve(path)
+        result = _resolve(path)
+    _RESOLVE_CACHE[path] = result
+    return result
+
+
+def resolve_filter(path: str, silent: bool=False) -> FrozenSet[str]:
+    """Resolve an instance path into a set of the filenames it refers to.
+
+    This is the same as resolve(), but allows quickly checking if a filename
+    matches.
+    """
+    try:
+        return _FILTER_CACHE[path]
+    except KeyError:
+        result = _FILTER_CACHE[path] = frozenset(resolve(path, silent))
+        return result
+
+
+def cache_info() -> CacheInfo:
+    """Return statistics about the selector cache."""
+    return CacheInfo(_cache_hits, len(_RESOLVE_CACHE), len(_RESOLVE_CACHE))
+
+
+def cache_clear() -> None:
+    """Clear the cached selectors."""
+    global _cache_hits
+    _cache_hits = 0
+    _RESOLVE_CACHE.clear()
+    _FILTER_CACHE.clear()
 
 Default_T = TypeVar('Default_T')
 
@@ -300,8 +361,6 @@ def resolve_one(path, default: Default_T='', error=False) -> Union[str, Default_
     return instances[0]
 
 
-# Cache the return values, since they're constant.
-@lru_cache(maxsize=256)
 def _resolve(path: str) -> List[str]:
     """Use a secondary function to allow caching values, while ignoring the
     'silent' parameter.
@@ -407,9 +466,9 @@ def get_subitems(comma_list, item_inst, item_id) -> List[str]:
     return inst_out
 
 
-# Copy over the lru_cache() functions to make them easily acessable.
-resolve.cache_info = _resolve.cache_info
-resolve.cache_clear = _resolve.cache_clear
+# Keep these accessible in the same place as lru_cache() would.
+resolve.cache_info = cache_info
+resolve.cache_clear = cache_clear
 
 
 def get_cust_inst(item_id: str, inst: str) -> Optional[str]:
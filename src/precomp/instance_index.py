@@ -0,0 +1,199 @@
+"""Maintains an index of the func_instances in the map.
+
+Most compile passes only care about a few specific instances, so instead of
+each one looping over every instance and casefolding the filename, they can
+look them up here by filename or trait.
+
+srctools doesn't tell us when keyvalues change, so code which changes the
+filename of an instance or adds one should call update(). Lookups
+double-check the current filename, so stale entries are never returned, but
+an instance renamed or added without calling update() won't be found under
+its new filename until refresh() is called. That checks the whole map, and is
+done between conditions if a result which might not call update() has run.
+"""
+from collections import defaultdict
+
+from srctools import VMF, Entity
+import srctools.logger
+from precomp import instance_traits
+
+from typing import (
+    Optional, Dict, Set, List, Iterator, Tuple, Collection,
+)
+
+LOGGER = srctools.logger.get_logger(__name__)
+
+_VMF: Optional[VMF] = None
+# Casefolded filename -> instances.
+_BY_FILE: Dict[str, Set[Entity]] = defaultdict(set)
+# For each instance, the raw filename it was indexed under.
+_FILE_FOR: Dict[Entity, str] = {}
+# Trait -> instances. This is built on demand, since traits are set after
+# the map is loaded.
+_BY_TRAIT: Optional[Dict[str, Set[Entity]]] = None
+# Each instance is numbered when first indexed, so instances added after
+# some point can be told apart. Renaming keeps the number.
+_SERIAL: Dict[Entity, int] = {}
+_next_serial = 0
+
+
+def build(vmf: VMF) -> None:
+    """Build the index for this map."""
+    global _VMF
+    _VMF = vmf
+    _BY_FILE.clear()
+    _FILE_FOR.clear()
+    _SERIAL.clear()
+    traits_changed()
+    for inst in vmf.by_class['func_instance']:
+        _add(inst)
+    LOGGER.info(
+        'Indexed {} instances, with {} unique filenames.',
+        len(_FILE_FOR), len(_BY_FILE),
+    )
+
+
+def _add(inst: Entity) -> None:
+    """Add an instance to the index."""
+    global _next_serial
+    filename = _FILE_FOR[inst] = inst['file']
+    _BY_FILE[filename.casefold()].add(inst)
+    if inst not in _SERIAL:
+        _SERIAL[inst] = _next_serial
+        _next_serial += 1
+    if _BY_TRAIT is not None:
+        for trait in instance_traits.get(inst):
+            _BY_TRAIT[trait].add(inst)
+
+
+def _discard(inst: Entity) -> None:
+    """Remove an instance from the index."""
+    try:
+        filename = _FILE_FOR.pop(inst)
+    except KeyError:
+        return
+    folded = filename.casefold()
+    _BY_FILE[folded].discard(inst)
+    if not _BY_FILE[folded]:
+        del _BY_FILE[folded]
+    if _BY_TRAIT is not None:
+        for insts in _BY_TRAIT.values():
+            insts.discard(inst)
+
+
+def update(inst: Entity) -> None:
+    """Update the index after an instance is changed, added or removed."""
+    _discard(inst)
+    if _in_map(inst):
+        _add(inst)
+    else:
+        _SERIAL.pop(inst, None)
+
+
+def refresh() -> None:
+    """Check the whole map for added, removed or refiled instances.
+
+    This only casefolds filenames which actually changed.
+    """
+    if _VMF is None:
+        return
+    current = _VMF.by_class['func_instance']
+    for inst in [inst for inst in _FILE_FOR if inst not in current]:
+        _discard(inst)
+        _SERIAL.pop(inst, None)
+    for inst in current:
+        try:
+            filename = _FILE_FOR[inst]
+        except KeyError:
+            _add(inst)
+            continue
+        if inst['file'] != filename:
+            _discard(inst)
+            _add(inst)
+
+
+def _in_map(inst: Entity) -> bool:
+    """Check if this instance is still in the map."""
+    return _VMF is not None and inst in _VMF.by_class['func_instance']
+
+
+def _is_valid(inst: Entity, files: Collection[str]) -> bool:
+    """Check an index entry is still correct."""
+    if not _in_map(inst):
+        _discard(inst)
+        return False
+    if _FILE_FOR.get(inst) != inst['file']:
+        # Changed without update() being called, fix it.
+        update(inst)
+        return inst['file'].casefold() in files
+    return True
+
+
+def by_file(files: Collection[str]) -> List[Entity]:
+    """Return all the instances using one of these casefolded filenames.
+
+    The result is a new list, so the map can be modified while iterating.
+    """
+    if isinstance(files, str):
+        files = {files}
+    found = []
+    for filename in files:
+        try:
+            insts = _BY_FILE[filename]
+        except KeyError:
+            continue
+        found.extend(insts)
+    return [inst for inst in found if _is_valid(inst, files)]
+
+
+def file_groups() -> Iterator[Tuple[str, List[Entity]]]:
+    """Yield each casefolded filename, and the instances using it."""
+    for filename, insts in list(_BY_FILE.items()):
+        yield filename, list(insts)
+
+
+def iter_files() -> Iterator[Tuple[str, Entity]]:
+    """Yield every instance, along with its casefolded filename."""
+    for filename, insts in list(_BY_FILE.items()):
+        for inst in list(insts):
+            yield filename, inst
+
+
+def all_files() -> Set[str]:
+    """Return the casefolded filenames of every instance in the map."""
+    return set(_BY_FILE)
+
+
+def by_trait(trait: str) -> List[Entity]:
+    """Return the instances with this trait.
+
+    If traits are added to instances, traits_changed() must be called.
+    """
+    global _BY_TRAIT
+    if _BY_TRAIT is None:
+        _BY_TRAIT = defaultdict(set)
+        for inst in _FILE_FOR:
+            for inst_trait in instance_traits.get(inst):
+                _BY_TRAIT[inst_trait].add(inst)
+    insts = _BY_TRAIT.get(trait, ())
+    # Traits can be removed without telling us, so check again.
+    return [
+        inst for inst in insts
+        if trait in instance_traits.get(inst) and _in_map(inst)
+    ]
+
+
+def traits_changed() -> None:
+    """Call after setting traits, so that index is rebuilt."""
+    global _BY_TRAIT
+    _BY_TRAIT = None
+
+
+def current_serial() -> int:
+    """Return a number to later check which instances were added since."""
+    return _next_serial
+
+
+def added_since(inst: Entity, serial: int) -> bool:
+    """Check if this instance was indexed after current_serial() returned serial."""
+    return _SERIAL.get(inst, serial) >= serial
@@ -183,14 +183,16 @@ def get_item_id(inst: Entity) -> Optional[str]:
 
 def set_traits(vmf: VMF):
     """Scan through the map, and apply traits to instances."""
-    for inst in vmf.by_class['func_instance']:
-        inst_file = inst['file'].casefold()
+    from precomp import instance_index
+    # Instances are grouped by filename, so we only need to look up each
+    # item once.
+    for inst_file, instances in instance_index.file_groups():
         if not inst_file:
             continue
         try:
             item_id, item_ind = ITEM_FOR_FILE[inst_file]
         except KeyError:
-            LOGGER.warning('Unknown instance "{}"!', inst['file'])
+            LOGGER.warning('Unknown instance "{}"!', instances[0]['file'])
             continue
 
         # BEE2_xxx special instance, shouldn't be in the original map...
@@ -207,27 +209,39 @@ def set_traits(vmf: VMF):
             LOGGER.warning('Unknown item class for id <{}>', item_id)
             item_class = ItemClass.UNCLASSED
 
-        inst.peti_class = item_class
-        inst.peti_item_id = item_id
-        traits = get(inst)
-        try:
-            traits |= ID_ATTRS[item_id.upper()][item_ind]
-        except (IndexError, KeyError):
-            pass
-        try:
-            traits |= CLASS_ATTRS[item_class][item_ind]
-        except (IndexError, KeyError):
-            pass
+        for inst in instances:
+            _set_inst_traits(inst, item_id, item_ind, item_class)
+    instance_index.traits_changed()
+
+
+def _set_inst_traits(
+    inst: Entity,
+    item_id: str,
+    item_ind: int,
+    item_class: ItemClass,
+) -> None:
+    """Apply the traits for a single instance."""
+    inst.peti_class = item_class
+    inst.peti_item_id = item_id
+    traits = get(inst)
+    try:
+        traits |= ID_ATTRS[item_id.upper()][item_ind]
+    except (IndexError, KeyError):
+        pass
+    try:
+        traits |= CLASS_ATTRS[item_class][item_ind]
+    except (IndexError, KeyError):
+        pass
 
-        try:
-            func = TRAIT_ID_FUNC[item_id.casefold()]
-        except KeyError:
-            pass
-        else:
-            func(inst, traits, item_id, item_ind)
-        try:
-            func = TRAIT_CLS_FUNC[item_class]
-        except KeyError:
-            pass
-        else:
-            func(inst, traits, item_id, item_ind)
\ No newline at end of file
+    try:
+        func = TRAIT_ID_FUNC[item_id.casefold()]
+    except KeyError:
+        pass
+    else:
+        func(inst, traits, item_id, item_ind)
+    try:
+        func = TRAIT_CLS_FUNC[item_class]
+    except KeyError:
+        pass
+    else:
+        func(inst, traits, item_id, item_ind)
\ No newline at end of file
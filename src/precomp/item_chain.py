@@ -4,7 +4,7 @@ This includes Unstationary Scaffolds and Vactubes.
 """
 from typing import Any, Dict, Container, List, Optional, Iterator
 
-from precomp import connections
+from precomp import connections, instance_index
 from srctools import Entity, VMF
 from precomp.connections import Item
 
@@ -38,9 +38,7 @@ def chain(
     # Name -> node
     nodes = {}  # type: Dict[str, Node]
 
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in inst_files:
-            continue
+    for inst in instance_index.by_file(inst_files):
         name = inst['targetname']
         try:
             nodes[name] = Node(connections.ITEMS[name])
@@ -296,6 +296,12 @@ DEFAULTS = [
     Opt('remove_exit_signs', False,
         """Remove the exit sign overlays for singleplayer.
         """),
+    Opt('cache_flags', False,
+        """Cache the results of condition flags for each instance.
+
+        Flags which only depend on the instance (like `instance` or `instVar`)
+        are then only evaluated once, until a result modifies the instance.
+        """),
 
     Opt('_tiling_template_', '__TILING_TEMPLATE__',
         """Change the template used for generating brushwork. 
@@ -1,5 +1,5 @@
 """Conditions related to packing."""
-from typing import Dict, Set
+from typing import Dict, Set, Tuple
 
 import srctools.logger
 from precomp import options, conditions
@@ -9,8 +9,12 @@ from srctools import VMF, Property, Vec
 LOGGER = srctools.logger.get_logger(__name__)
 COND_MOD_NAME = 'Packing'
 
-# Filenames we've packed, so we can avoid adding duplicate ents.
-_PACKED_FILES = set()  # type: Set[str]
+# Normalised filenames we've been asked to pack -> the filename and the file
+# type to pack them with. These are collected over the whole compile, then
+# written out once by write_packlist().
+_PACKED_FILES = {}  # type: Dict[str, Tuple[str, str]]
+# The number of files requested, including duplicates.
+_REQUEST_COUNT = 0
 
 PACKLISTS = {}  # type: Dict[str, Set[str]]
 
@@ -45,21 +49,47 @@ def pack_files(
     *files: str,
     file_type: str='generic',
 ) -> None:
-    """Add the given files to the packing list."""
-
-    packlist = set(files) - _PACKED_FILES
-
-    if not packlist:
-        return
-
-    ent = vmf.create_ent(
-        classname='comp_pack',
-        origin=options.get(Vec, 'global_ents_loc'),
+    """Add the given files to the packing list.
+
+    If a file is requested multiple times, a specific type is preferred
+    over 'generic', otherwise the first type is used.
+    """
+    global _REQUEST_COUNT
+    _REQUEST_COUNT += len(files)
+    for file in files:
+        file = file.replace('\\', '/')
+        key = file.casefold()
+        try:
+            old_file, old_type = _PACKED_FILES[key]
+        except KeyError:
+            _PACKED_FILES[key] = file, file_type
+        else:
+            if old_type == 'generic' and file_type != 'generic':
+                _PACKED_FILES[key] = old_file, file_type
+
+
+def write_packlist(vmf: VMF) -> None:
+    """Add comp_pack entities for all the files which need packing.
+
+    This produces one entity per file type.
+    """
+    by_type = {}  # type: Dict[str, Set[str]]
+    for file, file_type in _PACKED_FILES.values():
+        by_type.setdefault(file_type, set()).add(file)
+
+    for file_type, files in sorted(by_type.items()):
+        ent = vmf.create_ent(
+            classname='comp_pack',
+            origin=options.get(Vec, 'global_ents_loc'),
+        )
+        for i, file in enumerate(sorted(files), start=1):
+            ent[file_type + str(i)] = file
+
+    LOGGER.info(
+        'Packing {} files ({} requested), with {} comp_pack entities.',
+        len(_PACKED_FILES), _REQUEST_COUNT, len(by_type),
     )
 
-    for i, file in enumerate(packlist, start=1):
-        ent[file_type + str(i)] = file
-
 
 @conditions.make_result('Pack')
 def res_packlist(vmf: VMF, res: Property):
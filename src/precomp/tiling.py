@@ -31,6 +31,7 @@ from precomp.texturing import TileSize, Portalable
 from . import (
     grid_optim,
     instanceLocs,
+    instance_index,
     texturing,
     options,
     antlines,
@@ -237,6 +238,12 @@ TILETYPE_FROM_CHAR: Dict[str, TileType] = {
     for k, v in
     TILETYPE_TO_CHAR.items()
 }
+# TileType.value -> TileType, to decode the packed subtile arrays.
+# Subtiles are stored in a 16-byte bytearray, at index 4*u + v.
+_TILETYPE_BY_CODE: List[Optional[TileType]] = [None] * 256
+for _tile_type in TileType:
+    _TILETYPE_BY_CODE[_tile_type.value] = _tile_type
+del _tile_type
 
 
 @utils.freeze_enum_props
@@ -773,9 +780,11 @@ class TileDef:
         base_type: TileSize this tile started with.
         override: If set, a specific texture to use and orientation.
           This only applies to .is_tile tiles.
-        _sub_tiles: None or a Dict[(u,v): TileSize]. u/v are either xz,
-        yz or xy.
+        _sub_tiles: None or a 16-byte bytearray of TileType values, with
+          (u, v) at index 4*u + v. u/v are either xz, yz or xy.
           If None, it's the same as base_type.
+        _fizz_axis: If set to 'u' or 'v', the center section should be
+          nodrawed for a centered fizzler.
         bullseye_count: The number of bullseye items on this surface. If > 0,
           we have some.
         _portal_helper: The number of portal placement helpers here. If > 0,
@@ -791,6 +800,7 @@ class TileDef:
         'brush_faces',
         'base_type',
         '_sub_tiles',
+        '_fizz_axis',
         'override',
         'bullseye_count',
         '_portal_helper',
@@ -803,7 +813,8 @@ class TileDef:
 
     brush_faces: List[Side]
     panels: List[Panel]
-    _sub_tiles: Optional[Dict[Tuple[int, int], TileType]]
+    _sub_tiles: Optional[bytearray]
+    _fizz_axis: str
     override: Optional[Tuple[str, 'template_brush.ScalingTemplate']]
 
     bullseye_count: int
@@ -822,7 +833,16 @@ class TileDef:
         self.brush_faces = []
         self.override = None
         self.base_type = base_type
-        self._sub_tiles = subtiles
+        self._sub_tiles = None
+        self._fizz_axis = ''
+        if subtiles:
+            tiles = self._get_subtiles()
+            for uv, tile_type in subtiles.items():
+                if uv is SUBTILE_FIZZ_KEY:
+                    self._fizz_axis = cast(str, tile_type)
+                else:
+                    u, v = uv
+                    tiles[4 * u + v] = tile_type.value
         self.panels = []
         self.bullseye_count = 0
         self._portal_helper = 1 if has_helper else 0
@@ -883,17 +903,46 @@ class TileDef:
             )
         return tile
 
-    def _get_subtiles(self) -> Dict[Tuple[int, int], TileType]:
-        """Returns subtiles, creating it if not present."""
+    def _get_subtiles(self) -> bytearray:
+        """Returns the packed subtiles, creating it if not present."""
         if self._sub_tiles is None:
-            self._sub_tiles = tile = {
-                (x, y): self.base_type
-                for x in range(4) for y in range(4)
-            }
-            return tile
+            self._sub_tiles = tiles = bytearray([self.base_type.value]) * 16
+            return tiles
         else:
             return self._sub_tiles
 
+    def subtile_dict(self) -> Dict[Tuple[int, int], TileType]:
+        """Return the subtiles as a (u, v) -> type dict.
+
+        If a centered fizzler is present, SUBTILE_FIZZ_KEY is also set.
+        """
+        if self._sub_tiles is None:
+            tiles = dict.fromkeys(iter_uv(), self.base_type)
+        else:
+            codes = self._sub_tiles
+            tiles = {
+                (u, v): _TILETYPE_BY_CODE[codes[4 * u + v]]
+                for u in range(4) for v in range(4)
+            }
+        if self._fizz_axis:
+            # This violates the type definition.
+            tiles[SUBTILE_FIZZ_KEY] = cast(TileType, self._fizz_axis)
+        return tiles
+
+    def is_all(self, tile_type: TileType) -> bool:
+        """Check if every subtile is this type."""
+        if self._sub_tiles is None:
+            return self.base_type is tile_type
+        return self._sub_tiles.count(tile_type.value) == 16
+
+    def fill(self, tile_type: TileType) -> None:
+        """Set every subtile to this type."""
+        self.base_type = tile_type
+        if self._fizz_axis:
+            self._sub_tiles = bytearray([tile_type.value]) * 16
+        else:
+            self._sub_tiles = None
+
     def __getitem__(self, item: Tuple[int, int]) -> TileType:
         """Lookup the tile type at a particular sub-location."""
         u, v = item
@@ -903,7 +952,7 @@ class TileDef:
         if self._sub_tiles is None:
             return self.base_type
         else:
-            return self._sub_tiles[u, v]
+            return _TILETYPE_BY_CODE[self._sub_tiles[4 * u + v]]
 
     def __setitem__(self, item: Tuple[int, int], value: TileType) -> None:
         """Lookup the tile type at a particular sub-location."""
@@ -912,22 +961,16 @@ class TileDef:
             raise IndexError(u, v)
         
         if self._sub_tiles is None:
-            self._sub_tiles = {
-                (x, y): value if u == x and v == y else self.base_type
-                for x in range(4) for y in range(4)
-            }
+            self._get_subtiles()[4 * u + v] = value.value
         else:
-            self._sub_tiles[u, v] = value
+            tiles = self._sub_tiles
+            tiles[4 * u + v] = value.value
 
             # Check if we can merge this down to a single value.
-            # We can if we don't have the special fizzler key, and all
+            # We can if we don't have a centered fizzler, and all
             # the subtiles are the same.
-            if SUBTILE_FIZZ_KEY not in self._sub_tiles:
-                base_type = self._sub_tiles[0, 0]
-                for tile in self._sub_tiles.values():
-                    if tile is not base_type:
-                        return
-                self.base_type = base_type
+            if not self._fizz_axis and tiles.count(tiles[0]) == 16:
+                self.base_type = value
                 self._sub_tiles = None
 
     def __iter__(self) -> Iterator[Tuple[int, int, TileType]]:
@@ -938,12 +981,12 @@ class TileDef:
                 if self._sub_tiles is None:
                     yield u, v, self.base_type
                 else:
-                    yield u, v, self._sub_tiles[u, v]
+                    yield u, v, _TILETYPE_BY_CODE[self._sub_tiles[4 * u + v]]
 
     def set_fizz_orient(self, axis: str) -> None:
         """Set the centered fizzler nodraw strip."""
-        # This violates the _sub_tiles type definition.
-        self._get_subtiles()[SUBTILE_FIZZ_KEY] = cast(TileType, axis)
+        self._get_subtiles()
+        self._fizz_axis = axis
 
     def uv_offset(self, u: float, v: float, norm: float) -> Vec:
         """Return a u/v offset from our position.
@@ -981,14 +1024,13 @@ class TileDef:
         This yields (umin, umax, vmin, vmax, grid_size_, tile_type) tuples.
         """
 
-        # copy it, so we can overwrite positions with VOID = not a tile.
-        tiles = tiles.copy()
-
         # Don't check for special types if one is passed - that prevents
         # infinite recursion.
         if not _pattern:
             _pattern = 'clean'
             if SUBTILE_FIZZ_KEY in tiles:  # type: ignore
+                # copy it, so we don't modify the original.
+                tiles = tiles.copy()
                 # Output the split patterns for centered fizzlers.
                 # We need to remove it also so our iteration doesn't choke on it.
                 # 'u' or 'v'
@@ -1020,25 +1062,34 @@ class TileDef:
                     yield 0, 4, 1.5, 2.5, TileSize.TILE_4x4, TileType.NODRAW
                 return  # Don't run our checks on the tiles.
 
+        # Pack into an array, so we can overwrite positions with VOID = not
+        # a tile. Each row of constant u is then a contiguous slice.
+        void = TileType.VOID.value
+        codes = bytearray([void]) * 16
+        for (u, v), tile_type in tiles.items():
+            codes[4 * u + v] = tile_type.value
+
         for pattern in PATTERNS[_pattern]:
             if pattern.wall_only and not is_wall:
                 continue
             for umin, vmin, umax, vmax in pattern.tiles:
-                tile_type = tiles[umin, vmin]
-                if tile_type is TileType.VOID:
+                code = codes[4 * umin + vmin]
+                if code == void:
                     continue
-                for uv in iter_uv(umin, umax-1, vmin, vmax-1):
-                    if tiles[uv] is not tile_type:
+                width = vmax - vmin
+                for u in range(umin, umax):
+                    if codes.count(code, 4 * u + vmin, 4 * u + vmax) != width:
                         break
                 else:
-                    for uv in iter_uv(umin, umax-1, vmin, vmax-1):
-                        tiles[uv] = TileType.VOID
-                    yield umin, umax, vmin, vmax, pattern.tex, tile_type
+                    for u in range(umin, umax):
+                        codes[4 * u + vmin: 4 * u + vmax] = bytes([void]) * width
+                    yield umin, umax, vmin, vmax, pattern.tex, _TILETYPE_BY_CODE[code]
 
         # All unfilled spots are single 4x4 tiles, or other objects.
-        for (u, v), tile_type in tiles.items():  # type: ignore  # SUBTILE_FIZZ_KEY
-            if tile_type is not TileType.VOID:
-                yield u, u + 1, v, v + 1, TileSize.TILE_4x4, tile_type
+        for ind, code in enumerate(codes):
+            if code != void:
+                u, v = divmod(ind, 4)
+                yield u, u + 1, v, v + 1, TileSize.TILE_4x4, _TILETYPE_BY_CODE[code]
 
     def should_bevel(self, u: int, v: int) -> bool:
         """Check if this side of the TileDef should be bevelled.
@@ -1156,12 +1207,12 @@ class TileDef:
         for pos, tile in filled_tiles.items():
             self[pos] = tile
 
-        if all(tile is TileType.VOID for u, v, tile in self):
+        if self.is_all(TileType.VOID):
             return
 
         faces, brushes = self.gen_multitile_pattern(
             vmf,
-            self._get_subtiles(),
+            self.subtile_dict(),
             is_wall,
             bevels,
             self.normal,
@@ -1342,6 +1393,7 @@ class TileDef:
         """Check if this tile is a simple tile that can merge with neighbours."""
         if (
             self._sub_tiles is not None or
+            self._fizz_axis or
             self.panels or
             self.bullseye_count > 0 or
             self.override is not None
@@ -1686,12 +1738,12 @@ def analyse_map(vmf_file: VMF, side_to_ant_seg: Dict[int, List[
 
     # Look for Angled and Flip Panels, to link the tiledef to the instance.
     # First grab the instances.
-    panel_fname = instanceLocs.resolve('<ITEM_PANEL_ANGLED>, <ITEM_PANEL_FLIP>')
+    panel_fname = instanceLocs.resolve_filter('<ITEM_PANEL_ANGLED>, <ITEM_PANEL_FLIP>')
     # Also find PeTI-placed placement helpers, and move them into the tiledefs.
-    placement_helper_file = instanceLocs.resolve('<ITEM_PLACEMENT_HELPER>')
+    placement_helper_file = instanceLocs.resolve_filter('<ITEM_PLACEMENT_HELPER>')
 
     panels: Dict[str, Entity] = {}
-    for inst in vmf_file.by_class['func_instance']:
+    for inst in instance_index.by_file(panel_fname | placement_helper_file):
         filename = inst['file'].casefold()
         if filename in panel_fname:
             panels[inst['targetname']] = inst
@@ -0,0 +1,120 @@
+"""Records how long the BEE2 takes to start up.
+
+If the BEE2_PROFILE_STARTUP environment variable is set, the time taken to
+import each module and to run each phase of startup is recorded, then written
+to logs/startup_profile.txt once the UI is ready. Otherwise this does nothing.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder, Loader
+
+from typing import Optional, List, Tuple, Dict, Iterator
+
+ENABLED = bool(os.environ.get('BEE2_PROFILE_STARTUP'))
+
+# The number of modules to list in the report.
+REPORT_MODULES = 50
+
+_start_time = time.perf_counter()
+# Module -> (total time, time excluding nested imports).
+_import_times = {}  # type: Dict[str, Tuple[float, float]]
+# For the imports in progress, the time spent in nested imports.
+_import_stack = []  # type: List[float]
+# Each phase, and how long it took.
+_phases = []  # type: List[Tuple[str, float]]
+
+
+class _TimedLoader(Loader):
+    """Wraps a loader, to time how long the module takes to execute."""
+    def __init__(self, loader: Loader) -> None:
+        self.loader = loader
+
+    def __getattr__(self, name: str):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        _import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            duration = time.perf_counter() - start
+            nested = _import_stack.pop()
+            if _import_stack:
+                _import_stack[-1] += duration
+            _import_times[module.__name__] = (duration, duration - nested)
+
+
+class _TimedFinder(MetaPathFinder):
+    """Finds modules with the other finders, then wraps their loaders."""
+    def find_spec(self, fullname: str, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def install() -> None:
+    """Start recording import times, if enabled."""
+    if ENABLED and not any(isinstance(finder, _TimedFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _TimedFinder())
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Record how long this section of startup takes."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+
+def write_report(filename: Optional[str]=None) -> None:
+    """Write out the times recorded, and stop recording imports."""
+    if not ENABLED:
+        return
+    import utils
+    import srctools.logger
+    LOGGER = srctools.logger.get_logger(__name__)
+
+    sys.meta_path[:] = [
+        finder for finder in sys.meta_path
+        if not isinstance(finder, _TimedFinder)
+    ]
+    if filename is None:
+        filename = str(utils.install_path('logs/startup_profile.txt'))
+
+    total = time.perf_counter() - _start_time
+    with open(filename, 'w') as f:
+        f.write('Startup took {:.3f}s.\n\nPhases:\n'.format(total))
+        for name, duration in _phases:
+            f.write('{:>8.3f}s  {}\n'.format(duration, name))
+
+        f.write('\nSlowest {} of {} imports (self, total):\n'.format(
+            min(REPORT_MODULES, len(_import_times)),
+            len(_import_times),
+        ))
+        imports = sorted(
+            _import_times.items(),
+            key=lambda item: item[1][1],
+            reverse=True,
+        )
+        for module, (duration, self_time) in imports[:REPORT_MODULES]:
+            f.write('{:>8.3f}s {:>8.3f}s  {}\n'.format(
+                self_time, duration, module,
+            ))
+    LOGGER.info('Startup profile written to "{}".', filename)
@@ -8,18 +8,17 @@ import os
 import sys
 import shutil
 import random
-import logging
-from io import StringIO
 from collections import defaultdict, namedtuple, Counter
 
 from srctools import Property, Vec, AtomicWriter, Vec_tuple
 from srctools.vmf import VMF, Entity, Output
 from BEE2_config import ConfigFile
+from compile_progress import CompilerOutput, run_compiler
 import utils
-import srctools.run
 import srctools.logger
 from precomp import (
     instance_traits,
+    instance_index,
     brushLoc,
     bottomlessPit,
     instanceLocs,
@@ -94,6 +93,10 @@ IGNORED_OVERLAYS = set()
 
 PRESET_CLUMPS = []  # Additional clumps set by conditions, for certain areas.
 
+# When saving, the VMF is written to the file in chunks of roughly this
+# many characters.
+SAVE_CHUNK_SIZE = 1024 * 1024
+
 
 def load_settings() -> Tuple[antlines.AntType, antlines.AntType]:
     """Load in all our settings from vbsp_config."""
@@ -220,12 +223,31 @@ def load_settings() -> Tuple[antlines.AntType, antlines.AntType]:
 
 
 def load_map(map_path: str) -> VMF:
-    """Load in the VMF file."""
+    """Load in the VMF file.
+
+    Entities make up most of the map, so they're split off and converted
+    one at a time afterward. That way the property tree for each is freed
+    as we go, instead of keeping the whole tree around until the end.
+    """
     with open(map_path) as file:
         LOGGER.info("Parsing Map...")
         props = Property.parse(file, map_path)
     LOGGER.info('Reading Map...')
-    vmf = VMF.parse(props)
+    ent_props = []
+    other_props = []
+    for block in props:
+        if block.name == 'entity':
+            ent_props.append(block)
+        else:
+            other_props.append(block)
+    del props
+    vmf = VMF.parse(Property(None, other_props))
+    del other_props
+
+    # Pop from the end, so reverse to keep the original order.
+    ent_props.reverse()
+    while ent_props:
+        vmf.add_ent(Entity.parse(vmf, ent_props.pop()))
     LOGGER.info("Loading complete!")
     return vmf
 
@@ -791,10 +813,8 @@ def set_elev_videos(vmf: VMF) -> None:
         LOGGER.warning('Invalid elevator video type!')
         return
 
-    transition_ents = instanceLocs.resolve('[transitionents]')
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in transition_ents:
-            continue
+    transition_ents = instanceLocs.resolve_filter('[transitionents]')
+    for inst in instance_index.by_file(transition_ents):
         if vert_vid:
             inst.fixup[consts.FixupVars.BEE_ELEV_VERT] = 'media/' + vert_vid + '.bik'
         if horiz_vid:
@@ -863,7 +883,7 @@ def get_map_info(vmf: VMF) -> Set[str]:
     # The door frame instances
     entry_door_frame = exit_door_frame = None
 
-    for item in vmf.by_class['func_instance']:
+    for file, item in instance_index.iter_files():
         # Loop through all the instances in the map, looking for the entry/exit
         # doors.
         # - Read the $no_player_start var to see if we're in preview mode,
@@ -874,8 +894,6 @@ def get_map_info(vmf: VMF) -> Set[str]:
         #   in compile.cfg
         # Also build a set of all instances, to make a condition check easy
         # later
-
-        file = item['file'].casefold()
         LOGGER.debug('File: "{}"', file)
         if file in file_sp_exit_corr:
             GAME_MODE = 'SP'
@@ -1007,6 +1025,9 @@ def get_map_info(vmf: VMF) -> Set[str]:
             exit_corr_name,
         )
 
+    # Corridors and frames may have been swapped.
+    instance_index.refresh()
+
     # Return the set of all instances in the map.
     return inst_files
 
@@ -1117,12 +1138,11 @@ def calc_rand_seed(vmf: VMF) -> str:
 
      This ensures textures remain the same when the map is recompiled.
     """
-    amb_light = instanceLocs.resolve('<ITEM_POINT_LIGHT>')
+    amb_light = instanceLocs.resolve_filter('<ITEM_POINT_LIGHT>')
     lst = [
         inst['targetname'] or '-'  # If no targ
         for inst in
-        vmf.by_class['func_instance']
-        if inst['file'].casefold() in amb_light
+        instance_index.by_file(amb_light)
         ]
     if len(lst) == 0:
         # Very small maps won't have any ambient light entities at all.
@@ -1250,11 +1270,9 @@ def set_barrier_frame_type(vmf: VMF) -> None:
             (pos - grid_pos).norm().as_tuple()
         ] = barrier_type
 
-    barrier_files = instanceLocs.resolve('<ITEM_BARRIER>')
-    glass_file = instanceLocs.resolve('[glass_128]')
-    for inst in vmf.by_class['func_instance']:
-        if inst['file'].casefold() not in barrier_files:
-            continue
+    barrier_files = instanceLocs.resolve_filter('<ITEM_BARRIER>')
+    glass_file = instanceLocs.resolve_filter('[glass_128]')
+    for inst in instance_index.by_file(barrier_files):
         if inst['file'].casefold() in glass_file:
             # The glass instance faces a different way to the frames..
             norm = Vec(-1, 0, 0).rotate_by_str(inst['angles'])
@@ -1634,13 +1652,40 @@ def instance_symlink() -> None:
     os.symlink(inst, link_loc, target_is_directory=True)
 
 
+class ChunkWriter:
+    """Collects the many small writes from VMF.export(), and passes them on
+    to the real file in large chunks.
+    """
+    def __init__(self, file, chunk_size: int=SAVE_CHUNK_SIZE) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.parts = []  # type: List[str]
+        self.size = 0
+
+    def write(self, data: str) -> None:
+        """Add data to the buffer, writing it out if large enough."""
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all the buffered data to the file."""
+        if self.parts:
+            self.file.write(''.join(self.parts))
+            self.parts.clear()
+            self.size = 0
+
+
 def save(vmf: VMF, path: str) -> None:
     """Save the modified map back to the correct location.
     """
     LOGGER.info("Saving New Map...")
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with AtomicWriter(path) as f:
-        vmf.export(dest_file=f, inc_version=True)
+        writer = ChunkWriter(f)
+        vmf.export(dest_file=writer, inc_version=True)
+        writer.flush()
     LOGGER.info("Complete!")
 
 
@@ -1675,15 +1720,17 @@ def run_vbsp(vbsp_args, path, new_path=None) -> None:
     # Use a special name for VBSP's output..
     vbsp_logger = srctools.logger.get_logger('valve.VBSP', alias='<Valve>')
 
-    # And also save a copy for us to analyse.
-    buff = StringIO()
-    vbsp_logger.addHandler(logging.StreamHandler(buff))
+    # And also analyse it as it's produced.
+    output = CompilerOutput('vbsp')
+    vbsp_logger.addHandler(output)
 
-    code = srctools.run.run_compiler('vbsp', vbsp_args, vbsp_logger)
+    code = run_compiler('vbsp', vbsp_args, vbsp_logger, output)
+    vbsp_logger.removeHandler(output)
+    output.finish(code)
     if code != 0:
         # VBSP didn't succeed.
         if is_peti:  # Ignore Hammer maps
-            process_vbsp_fail(buff.getvalue())
+            process_vbsp_fail(output.limit_error)
 
         # Propagate the fail code to Portal 2, and quit.
         sys.exit(code)
@@ -1692,7 +1739,7 @@ def run_vbsp(vbsp_args, path, new_path=None) -> None:
     LOGGER.info("VBSP Done!")
 
     if is_peti:  # Ignore Hammer maps
-        process_vbsp_log(buff.getvalue())
+        process_vbsp_log(output.counts)
 
     # Copy over the real files so vvis/vrad can read them
         for ext in (".bsp", ".log", ".prt"):
@@ -1703,50 +1750,17 @@ def run_vbsp(vbsp_args, path, new_path=None) -> None:
                 )
 
 
-def process_vbsp_log(output: str) -> None:
-    """Read through VBSP's log, extracting entity counts.
+def process_vbsp_log(found_counts: Dict[str, Tuple[str, str]]) -> None:
+    """Store the entity counts found in VBSP's output.
 
     This is then passed back to the main BEE2 application for display.
     """
-
-    # The output is something like this:
-    # nummapplanes:     (?? / 65536)
-    # nummapbrushes:    (?? / 8192)
-    # nummapbrushsides: (?? / 65536)
-    # num_map_overlays: (?? / 512)
-    # nummodels:        (?? / 1024)
-    # num_entities:     (?? / 16384)
-
-    desired_vals = [
-        # VBSP values -> config names
-        ('nummapbrushes:', 'brush'),
-        ('num_map_overlays:', 'overlay'),
-        ('num_entities:', 'entity'),
-    ]
-    # The other options rarely hit the limits, so we don't track them.
-
     counts = {
         'brush': ('0', '8192'),
         'overlay': ('0', '512'),
         'entity': ('0', '2048'),
     }
-
-    for line in output.splitlines():
-        line = line.lstrip(' \t[|')
-        for name, conf in desired_vals:
-            if not line.startswith(name):
-                continue
-            # Grab the value from ( onwards
-            fraction = line.split('(', 1)[1]
-            # Grab the two numbers, convert to ascii and strip
-            # whitespace.
-            count_num, count_max = fraction.split('/')
-            counts[conf] = (
-                count_num.strip(' \t\n'),
-                # Strip the ending ) off the max. We have the value, so
-                # we might as well tell the BEE2 if it changes..
-                count_max.strip(') \t\n'),
-            )
+    counts.update(found_counts)
 
     LOGGER.info('Retrieved counts: {}', counts)
     count_section = BEE2_config['Counts']
@@ -1756,8 +1770,11 @@ def process_vbsp_log(output: str) -> None:
     BEE2_config.save()
 
 
-def process_vbsp_fail(output: str) -> None:
-    """Read through VBSP's logs when failing, to update counts."""
+def process_vbsp_fail(line: str) -> None:
+    """Update counts when VBSP fails.
+
+    line is the last line of output which mentioned a limit, if any.
+    """
     # VBSP doesn't output the actual entity counts, so set the errorred
     # one to max and the others to zero.
     count_section = BEE2_config['Counts']
@@ -1766,25 +1783,21 @@ def process_vbsp_fail(output: str) -> None:
     count_section['max_entity'] = '2048'
     count_section['max_overlay'] = '512'
 
-    for line in reversed(output.splitlines()):
-        if 'MAX_MAP_OVERLAYS' in line:
-            count_section['entity'] = '0'
-            count_section['brush'] = '0'
-            # The line is like 'MAX_MAP_OVER = 512', pull out the number from
-            # the end and decode it.
-            over_count = line.rsplit('=')[1].strip()
-            count_section['overlay'] = over_count
-            count_section['max_overlay'] = over_count
-            break
-        if 'MAX_MAP_BRUSHSIDES' in line or 'MAX_MAP_PLANES' in line:
-            count_section['entity'] = '0'
-            count_section['overlay'] = '0'
-            count_section['brush'] = '8192'
-            break
-        if 'MAX_MAP_ENTITIES' in line:
-            count_section['entity'] = count_section['overlay'] = '0'
-            count_section['brush'] = '8192'
-            break
+    if 'MAX_MAP_OVERLAYS' in line:
+        count_section['entity'] = '0'
+        count_section['brush'] = '0'
+        # The line is like 'MAX_MAP_OVER = 512', pull out the number from
+        # the end and decode it.
+        over_count = line.rsplit('=')[1].strip()
+        count_section['overlay'] = over_count
+        count_section['max_overlay'] = over_count
+    elif 'MAX_MAP_BRUSHSIDES' in line or 'MAX_MAP_PLANES' in line:
+        count_section['entity'] = '0'
+        count_section['overlay'] = '0'
+        count_section['brush'] = '8192'
+    elif 'MAX_MAP_ENTITIES' in line:
+        count_section['entity'] = count_section['overlay'] = '0'
+        count_section['brush'] = '8192'
     else:
         count_section['entity'] = '0'
         count_section['overlay'] = '0'
@@ -1799,11 +1812,13 @@ def main() -> None:
     global MAP_RAND_SEED
     LOGGER.info("BEE{} VBSP hook initiallised.", utils.BEE_VERSION)
 
-    conditions.import_conditions()  # Import all the conditions and
-    # register them.
+    # The other conditions modules are imported when their flags or results
+    # are used, but metaconditions need to be registered now.
+    conditions.import_meta_conditions()
 
     if 'BEE2_WIKI_OPT_LOC' in os.environ:
         # Special override - generate docs for the BEE2 wiki.
+        conditions.import_conditions()
         LOGGER.info('Writing Wiki text...')
         with open(os.environ['BEE2_WIKI_OPT_LOC'], 'w') as f:
             options.dump_info(f)
@@ -1893,6 +1908,7 @@ def main() -> None:
         ant_floor, ant_wall = load_settings()
 
         vmf = load_map(path)
+        instance_index.build(vmf)
         instance_traits.set_traits(vmf)
 
         ant, side_to_antline = antlines.parse_antlines(vmf)
@@ -1938,6 +1954,7 @@ def main() -> None:
         change_overlays(vmf)
         barriers.make_barriers(vmf)
         fix_worldspawn(vmf)
+        packing.write_packlist(vmf)
 
         # Ensure all VMF outputs use the correct separator.
         for ent in vmf.entities:
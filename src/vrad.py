@@ -14,7 +14,7 @@ from io import BytesIO
 from zipfile import ZipFile
 from typing import List, Set
 
-import srctools.run
+import srctools.logger
 from srctools import Property, FGD
 from srctools.bsp import BSP, BSP_LUMPS
 from srctools.filesys import (
@@ -24,7 +24,9 @@ from srctools.filesys import (
 from srctools.packlist import PackList
 from srctools.game import find_gameinfo
 from srctools.bsp_transform import run_transformations
+from compile_progress import CompilerOutput, run_compiler
 
+import postcomp
 from postcomp import (
     music,
     screenshot,
@@ -33,7 +35,25 @@ from postcomp import (
 )
 
 
-def dump_files(bsp: BSP, dump_folder: str) -> None:
+def is_bee2_fsys(fsys: FileSystem) -> bool:
+    """Check if this is one of our 'bee2/' or 'bee2_dev/' folders."""
+    return (
+        isinstance(fsys, RawFileSystem) and
+        'bee2' in os.path.basename(fsys.path).casefold()
+    )
+
+
+def open_packfile(bsp: BSP) -> ZipFile:
+    """Open the pakfile lump for reading.
+
+    Unlike BSP.packfile(), the lump isn't written back (copying it) when
+    closed. BytesIO shares the bytes object until written to, so it isn't
+    copied here either.
+    """
+    return ZipFile(BytesIO(bsp.get_lump(BSP_LUMPS.PAKFILE)))
+
+
+def dump_files(zipfile: ZipFile, dump_folder: str) -> None:
     """Dump packed files to a location.
     """
     if not dump_folder:
@@ -61,14 +81,24 @@ def dump_files(bsp: BSP, dump_folder: str) -> None:
         else:
             os.remove(name)
 
-    with bsp.packfile() as zipfile:
-        for zipinfo in zipfile.infolist():
-            zipfile.extract(zipinfo, dump_folder)
+    for zipinfo in zipfile.infolist():
+        zipfile.extract(zipinfo, dump_folder)
 
 
 def run_vrad(args: List[str]) -> None:
     """Execute the original VRAD."""
-    code = srctools.run.run_compiler(os.path.join(os.getcwd(), "vrad"), args)
+    vrad_logger = srctools.logger.get_logger('valve.VRAD', alias='<Valve>')
+    output = CompilerOutput('vrad')
+    vrad_logger.addHandler(output)
+
+    code = run_compiler(
+        os.path.join(os.getcwd(), "vrad"),
+        args,
+        vrad_logger,
+        output,
+    )
+    vrad_logger.removeHandler(output)
+    output.finish(code)
     if code == 0:
         LOGGER.info("Done!")
     else:
@@ -198,12 +228,9 @@ def main(argv: List[str]) -> None:
             fsys.systems.remove(child_sys)
             fsys.systems.insert(0, child_sys)
 
-    zip_data = BytesIO()
-    zip_data.write(bsp_file.get_lump(BSP_LUMPS.PAKFILE))
-    zipfile = ZipFile(zip_data)
-
     # Mount the existing packfile, so the cubemap files are recognised.
-    fsys.add_sys(ZipFileSystem('<BSP pakfile>', zipfile))
+    orig_packfile = open_packfile(bsp_file)
+    fsys.add_sys(ZipFileSystem('<BSP pakfile>', orig_packfile))
 
     fsys.open_ref()
 
@@ -222,10 +249,18 @@ def main(argv: List[str]) -> None:
     )
 
     # We need to add all soundscripts in scripts/bee2_snd/
-    # This way we can pack those, if required.
-    for soundscript in fsys.walk_folder('scripts/bee2_snd/'):
-        if soundscript.path.endswith('.txt'):
-            packlist.load_soundscript(soundscript, always_include=False)
+    # This way we can pack those, if required. Only our folders have these,
+    # so don't walk through all the game's VPKs looking for them.
+    # Earlier systems override later ones, like the chain does.
+    seen_scripts = set()  # type: Set[str]
+    for child_sys, prefix in fsys.systems:
+        if prefix or not is_bee2_fsys(child_sys):
+            continue
+        for soundscript in child_sys.walk_folder('scripts/bee2_snd/'):
+            folded = soundscript.path.casefold().replace('\\', '/')
+            if folded.endswith('.txt') and folded not in seen_scripts:
+                seen_scripts.add(folded)
+                packlist.load_soundscript(soundscript, always_include=False)
 
     if is_peti:
         LOGGER.info('Checking for music:')
@@ -241,6 +276,12 @@ def main(argv: List[str]) -> None:
                 pass
 
     LOGGER.info('Run transformations...')
+    for name_a, name_b, shared in postcomp.find_conflicts():
+        LOGGER.warning(
+            'Transforms "{}" and "{}" both use {}, so the result depends '
+            'on which runs first!',
+            name_a, name_b, ', '.join(sorted(shared)),
+        )
     run_transformations(bsp_ents, fsys, packlist, bsp_file, game)
 
     LOGGER.info('Scanning map for files to pack:')
@@ -262,18 +303,14 @@ def main(argv: List[str]) -> None:
         # Exclude absolutely everything except our folder.
         for child_sys, _ in fsys.systems:
             # Add 'bee2/' and 'bee2_dev/' only.
-            if (
-                isinstance(child_sys, RawFileSystem) and
-                'bee2' in os.path.basename(child_sys.path).casefold()
-            ):
+            if is_bee2_fsys(child_sys):
                 pack_whitelist.add(child_sys)
             else:
                 pack_blacklist.add(child_sys)
 
     if '-no_pack' not in args:
         # Cubemap files packed into the map already.
-        with bsp_file.packfile() as zipfile:
-            existing = set(zipfile.namelist())
+        existing = set(orig_packfile.namelist())
 
         LOGGER.info('Writing to BSP...')
         packlist.pack_into_zip(
@@ -283,12 +320,12 @@ def main(argv: List[str]) -> None:
             blacklist=pack_blacklist,
         )
 
-        with bsp_file.packfile() as zipfile:
+    with open_packfile(bsp_file) as zipfile:
+        if '-no_pack' not in args:
             LOGGER.info('Packed files:\n{}', '\n'.join(
                 set(zipfile.namelist()) - existing
             ))
-
-    dump_files(bsp_file, conf['packfile_dump', ''])
+        dump_files(zipfile, conf['packfile_dump', ''])
 
     # Copy new entity data.
     bsp_file.lumps[BSP_LUMPS.ENTITIES].data = BSP.write_ent_data(bsp_ents)